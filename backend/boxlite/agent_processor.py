@@ -12,6 +12,7 @@ Key differences from WebContainer agent:
 
 from __future__ import annotations
 import os
+import sys
 import json
 import logging
 import asyncio
@@ -20,7 +21,6 @@ from dataclasses import dataclass, field
 from datetime import datetime
 
 import anthropic
-from openai import AsyncOpenAI, APIError as OpenAIAPIError
 
 from pathlib import Path
 
@@ -82,6 +82,14 @@ def _is_proxy_enabled() -> bool:
     return os.getenv("USE_CLAUDE_PROXY", "").lower() in ("true", "1", "yes")
 
 
+# openai is only imported on the OpenAI-compatible proxy path (see _init_claude_client)
+
+def _is_openai_api_error(e: Exception) -> bool:
+    """Check if e is an openai.APIError, without importing openai"""
+    module = sys.modules.get("openai")
+    return module is not None and isinstance(e, module.APIError)
+
+
 # ============================================
 # Mock Response Classes (for OpenAI proxy)
 # ============================================
@@ -176,6 +184,8 @@ class BoxLiteAgentProcessor:
                 self.openai_client = None
                 logger.info(f"[BoxLiteAgent] Using Anthropic-native proxy: {base_url}")
             else:
+                from openai import AsyncOpenAI
+
                 self.openai_client = AsyncOpenAI(
                     api_key=proxy_api_key,
                     base_url=proxy_base_url,
@@ -601,14 +611,13 @@ Please fix these errors now."""
                     logger.info("[BoxLiteAgent] Completion check passed, no errors")
                     break
 
-            except (anthropic.APIError, OpenAIAPIError) as e:
-                logger.error(f"[BoxLiteAgent] API error: {e}")
-                yield {"type": "error", "error": f"API error: {str(e)}"}
-                break
-
             except Exception as e:
-                logger.error(f"[BoxLiteAgent] Error: {e}", exc_info=True)
-                yield {"type": "error", "error": str(e)}
+                if isinstance(e, anthropic.APIError) or _is_openai_api_error(e):
+                    logger.error(f"[BoxLiteAgent] API error: {e}")
+                    yield {"type": "error", "error": f"API error: {str(e)}"}
+                else:
+                    logger.error(f"[BoxLiteAgent] Error: {e}", exc_info=True)
+                    yield {"type": "error", "error": str(e)}
                 break
 
     # ============================================
@@ -1048,7 +1057,8 @@ Please fix these errors now."""
             checkpoint_name = f"{project_name} - Auto-save ({timestamp})"
 
             # Save checkpoint
-            checkpoint = checkpoint_store.save_checkpoint(
+            checkpoint = await asyncio.to_thread(
+                checkpoint_store.save_checkpoint,
                 project_id=self.current_project_id,
                 name=checkpoint_name,
                 conversation=conversation,
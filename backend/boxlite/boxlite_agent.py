@@ -12,6 +12,7 @@ Key Differences:
 
 from __future__ import annotations
 import os
+import sys
 import json
 import logging
 import asyncio
@@ -21,7 +22,6 @@ from datetime import datetime
 from pathlib import Path
 
 import anthropic
-from openai import AsyncOpenAI, APIError as OpenAIAPIError
 
 from agent.memory_sdk import SDKMemoryManager, create_memory_manager
 from agent.prompts import get_system_prompt
@@ -75,6 +75,14 @@ def _is_proxy_enabled() -> bool:
     return os.getenv("USE_CLAUDE_PROXY", "").lower() in ("true", "1", "yes")
 
 
+# openai is only imported on the OpenAI-compatible proxy path (see _init_claude_client)
+
+def _is_openai_api_error(e: Exception) -> bool:
+    """Check if e is an openai.APIError, without importing openai"""
+    module = sys.modules.get("openai")
+    return module is not None and isinstance(e, module.APIError)
+
+
 # ============================================
 # Agent Session
 # ============================================
@@ -153,6 +161,8 @@ class BoxLiteClaudeAgent:
                 self.openai_client = None
                 logger.info(f"[BoxLite Agent] Using Anthropic-native proxy: {base_url}")
             else:
+                from openai import AsyncOpenAI
+
                 self.openai_client = AsyncOpenAI(
                     api_key=proxy_api_key,
                     base_url=proxy_base_url,
@@ -520,14 +530,13 @@ When a user selects a source and asks you to clone it:
                     logger.info("[BoxLite Agent] End turn, complete")
                     break
 
-            except (anthropic.APIError, OpenAIAPIError) as e:
-                logger.error(f"[BoxLite Agent] API error: {e}")
-                yield {"type": "error", "error": f"API error: {str(e)}"}
-                break
-
             except Exception as e:
-                logger.error(f"[BoxLite Agent] Unexpected error: {e}", exc_info=True)
-                yield {"type": "error", "error": str(e)}
+                if isinstance(e, anthropic.APIError) or _is_openai_api_error(e):
+                    logger.error(f"[BoxLite Agent] API error: {e}")
+                    yield {"type": "error", "error": f"API error: {str(e)}"}
+                else:
+                    logger.error(f"[BoxLite Agent] error: {e}", exc_info=True)
+                    yield {"type": "error", "error": str(e)}
                 break
 
     # ============================================
@@ -830,7 +839,8 @@ When a user selects a source and asks you to clone it:
             checkpoint_name = f"Auto-save ({datetime.now().strftime('%H:%M:%S')})"
 
             # Save checkpoint
-            checkpoint = checkpoint_store.save_checkpoint(
+            checkpoint = await asyncio.to_thread(
+                checkpoint_store.save_checkpoint,
                 project_id=self.current_project_id,
                 name=checkpoint_name,
                 conversation=conversation,
@@ -347,7 +347,7 @@ class BoxLiteMCPExecutor:
                 )
 
             # 检查是否有相关进程在运行
-            running_terminals = [t for t in state.terminals if t.is_running]
+            running_terminals = [t for t in state.terminals.values() if t.is_running]
             for t in running_terminals:
                 if any(cmd in (t.command or "") for cmd in dev_server_commands):
                     return (
@@ -732,7 +732,7 @@ async def get_terminal_output(
         )
 
     # Find target terminal
-    target_id = terminal_id or state.active_terminal_id or state.terminals[0].id
+    target_id = terminal_id or state.active_terminal_id or next(iter(state.terminals))
     output = sandbox.get_terminal_output(target_id, lines)
 
     if not output:
@@ -788,7 +788,7 @@ async def get_state(
 
     # Terminals
     lines.append(f"\n## Terminals ({len(state.terminals)})")
-    for term in state.terminals:
+    for term in state.terminals.values():
         status = "running" if term.is_running else "idle"
         lines.append(f"  - [{term.id}] {status}: {term.command or 'shell'}")
 
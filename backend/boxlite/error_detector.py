@@ -181,7 +181,8 @@ class TerminalDetector:
             terminals_to_check.append(self.dev_server_process)
 
         for term in terminals_to_check:
-            output_buffer = getattr(term, 'output_buffer', [])
+            # Snapshot the (deque) buffer so it can be sliced for context
+            output_buffer = list(getattr(term, 'output_buffer', ()))
 
             for i, line in enumerate(output_buffer):
                 # Skip lines that match exclude patterns (normal logs)
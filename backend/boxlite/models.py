@@ -6,7 +6,7 @@ Pydantic models for BoxLite sandbox operations.
 
 from __future__ import annotations
 from typing import Optional, List, Dict, Any, Literal
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_serializer
 from datetime import datetime
 from enum import Enum
 
@@ -186,8 +186,8 @@ class SandboxState(BaseModel):
     files: Dict[str, str] = {}  # path -> content
     active_file: Optional[str] = None
 
-    # Terminals
-    terminals: List[TerminalSession] = []
+    # Terminals (keyed by id for O(1) removal; serialized as a list)
+    terminals: Dict[str, TerminalSession] = {}
     active_terminal_id: Optional[str] = None
 
     # Preview
@@ -202,6 +202,11 @@ class SandboxState(BaseModel):
     created_at: datetime = Field(default_factory=datetime.now)
     updated_at: datetime = Field(default_factory=datetime.now)
 
+    @field_serializer("terminals")
+    def _serialize_terminals(self, terminals: Dict[str, TerminalSession]) -> List[TerminalSession]:
+        """Keep the wire format a list of sessions"""
+        return list(terminals.values())
+
 
 # ============================================
 # Tool Request/Response Models
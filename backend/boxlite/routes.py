@@ -341,7 +341,8 @@ async def restore_checkpoint(sandbox_id: str, request: RestoreCheckpointRequest)
         manager = get_sandbox_manager(sandbox_id)
 
         # 1. Fetch checkpoint data
-        checkpoint = checkpoint_store.get_checkpoint(
+        checkpoint = await asyncio.to_thread(
+            checkpoint_store.get_checkpoint,
             request.project_id,
             request.checkpoint_id
         )
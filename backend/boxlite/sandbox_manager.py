@@ -11,15 +11,24 @@ local Docker containers or native processes.
 
 from __future__ import annotations
 import os
+import sys
 import asyncio
 import logging
 import uuid
 import tempfile
 import shutil
 import json
+import socket
+import time
+import io
+import itertools
+import threading
+from binascii import b2a_base64
+from collections import deque
 from typing import Optional, Dict, List, Any, Callable
 from datetime import datetime
 from pathlib import Path
+from urllib.parse import urlparse
 from dataclasses import dataclass, field
 
 from .models import (
@@ -51,6 +60,58 @@ MAX_TERMINALS = 5
 MAX_CONSOLE_MESSAGES = 200
 MAX_OUTPUT_LINES = 1000
 DEFAULT_TIMEOUT = 60.0  # seconds
+PORT_PROBE_INTERVAL = 0.05  # seconds between bind attempts while waiting for a port
+BROWSER_RECYCLE_AFTER = 50  # Relaunch the screenshot browser after this many uses
+
+# Screenshot limits - aggressive to avoid context overflow
+SCREENSHOT_VIEWPORT = {"width": 1024, "height": 768}
+SCREENSHOT_MAX_WIDTH = 600
+SCREENSHOT_MAX_HEIGHT = 800  # Also limit height to avoid tall screenshots
+SCREENSHOT_MAX_BYTES = 50000  # 50KB limit for base64 (about 67KB after encoding)
+SCREENSHOT_QUALITY = 50
+# Device scale factor that makes Chromium render the viewport straight at the max size
+# (layout still happens at SCREENSHOT_VIEWPORT, so pages keep their desktop breakpoints)
+SCREENSHOT_SCALE = min(
+    SCREENSHOT_MAX_WIDTH / SCREENSHOT_VIEWPORT["width"],
+    SCREENSHOT_MAX_HEIGHT / SCREENSHOT_VIEWPORT["height"],
+    1,
+)
+SUMMARY_VIEWPORT = {"width": 1280, "height": 720}  # Reported viewport/body size (pydantic copies it on validation)
+VISUAL_SUMMARY_TTL = 2.0  # seconds a visual summary is reused if nothing changed
+PREVIEW_PROBE_TIMEOUT = 0.2  # seconds for the TCP check before loading the preview
+# Render-ready signal for the Vite/React template: the app has mounted into #root
+RENDER_READY_SELECTOR = "#root > *"
+RENDER_READY_TIMEOUT = 5000  # ms to wait for it before falling back to the 'load' event
+
+# Collects everything the visual summary needs from the page in one evaluate
+PAGE_INFO_SCRIPT = """() => ({
+    title: document.title,
+    text: document.body?.innerText?.substring(0, 1000) || '',
+    count: document.querySelectorAll('*').length
+})"""
+
+# Directories never mirrored into state.files, at any depth (hidden dirs are skipped too)
+SKIP_DIRS = frozenset({"node_modules", ".git"})
+# Build output directories, skipped only at the project root - src/build/ etc. is source
+ROOT_SKIP_DIRS = frozenset({".next", ".cache", "dist", "build"})
+MAX_SYNC_FILE_SIZE = 1 << 20  # Larger files are assets, not source - not mirrored
+
+# Extensions mirrored without sniffing; anything else is checked for NUL bytes first
+TEXT_EXTENSIONS = frozenset({
+    ".js", ".jsx", ".ts", ".tsx", ".mjs", ".cjs", ".json", ".css", ".scss",
+    ".html", ".md", ".txt", ".yml", ".yaml", ".svg", ".toml", ".xml", ".vue",
+})
+BINARY_SNIFF_BYTES = 1024
+
+# Snapshot of state.files persisted so reconnects skip re-reading unchanged
+# files. Kept in SANDBOX_BASE_DIR/SNAPSHOT_DIR, outside the project tree, so it
+# is never synced, searched or exported with the user's files.
+SNAPSHOT_DIR = ".snapshots"
+SNAPSHOT_VERSION = 1
+SNAPSHOT_DEBOUNCE = 0.5  # seconds
+
+# Characters that need /bin/sh to interpret; argv commands without them are exec'd directly
+SHELL_METACHARACTERS = frozenset("|&;<>()$`\\\"'*?[]{}~#!\n")
 
 # Default project template
 DEFAULT_FILES = {
@@ -170,6 +231,145 @@ export default App
 }
 
 
+def _read_text_file(disk_path: str, size: Optional[int] = None) -> str:
+    """Read a UTF-8 text file with raw os.open/os.read and a single decode
+
+    Skips the buffered file object entirely: one open, usually one read of
+    the whole file, one close. Pass size when it's already known (e.g. from
+    a DirEntry) to skip the fstat. Raises UnicodeDecodeError for binary
+    content, like Path.read_text.
+    """
+    fd = os.open(disk_path, os.O_RDONLY)
+    try:
+        if size is None:
+            size = os.fstat(fd).st_size
+        # One extra byte so a file that grew since the stat is noticed and finished below
+        data = os.read(fd, size + 1)
+        if len(data) > size:
+            chunks = [data]
+            while chunk := os.read(fd, 1 << 16):
+                chunks.append(chunk)
+            data = b"".join(chunks)
+    finally:
+        os.close(fd)
+    return data.decode("utf-8")
+
+
+def _looks_like_text(disk_path: str) -> bool:
+    """Cheap binary check: known text extension, or no NUL in the first 1KB
+
+    Lets scans skip images/fonts without reading and decoding the whole file.
+    """
+    if os.path.splitext(disk_path)[1].lower() in TEXT_EXTENSIONS:
+        return True
+    try:
+        with open(disk_path, "rb") as f:
+            return b"\0" not in f.read(BINARY_SNIFF_BYTES)
+    except OSError:
+        return False
+
+
+def _needs_shell(parts: List[str]) -> bool:
+    """Check whether any command part relies on shell syntax (globs, pipes, vars...)"""
+    return any(ch in SHELL_METACHARACTERS for part in parts for ch in part)
+
+
+def _port_is_free(port: int) -> bool:
+    """Check whether the port can be bound right now
+
+    Uses SO_REUSEADDR like Node does, so sockets lingering in TIME_WAIT
+    don't count as occupied.
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind(("0.0.0.0", port))
+        return True
+    except OSError:
+        return False
+    finally:
+        sock.close()
+
+
+async def _wait_port_free(port: int, timeout: float) -> bool:
+    """Poll until the port can be bound, returning as soon as it's released"""
+    deadline = time.monotonic() + timeout
+    while True:
+        if _port_is_free(port):
+            return True
+        if time.monotonic() >= deadline:
+            return False
+        await asyncio.sleep(PORT_PROBE_INTERVAL)
+
+
+_pil_image = None
+
+
+def _get_pil_image():
+    """Import PIL.Image on first use and cache it (raises ImportError if missing)"""
+    global _pil_image
+    if _pil_image is None:
+        from PIL import Image
+        _pil_image = Image
+    return _pil_image
+
+
+# Per-thread JPEG output buffer, reused across compressions in to_thread workers
+_jpeg_buffers = threading.local()
+
+
+def _compress_screenshot(png_bytes: bytes) -> bytes:
+    """Re-encode a PNG screenshot as a small JPEG
+
+    The screenshot is expected to be captured at its final size already
+    (see SCREENSHOT_SCALE), so there's no resize here. CPU-bound, so callers
+    run it in a worker thread. Raises ImportError when Pillow isn't installed.
+    """
+    Image = _get_pil_image()
+
+    img = Image.open(io.BytesIO(png_bytes))
+    original_size = len(png_bytes)
+
+    # JPEG has no alpha; Chromium screenshots are usually RGB already, so only copy when needed
+    if img.mode != 'RGB':
+        img = img.convert('RGB')
+
+    buffer = getattr(_jpeg_buffers, 'buffer', None)
+    if buffer is None:
+        buffer = _jpeg_buffers.buffer = io.BytesIO()
+
+    # Convert to JPEG with aggressive compression
+    # Start with SCREENSHOT_QUALITY, reduce if still too large.
+    # optimize=True (Huffman re-optimization) roughly doubles encode time for a few % size.
+    quality = SCREENSHOT_QUALITY
+    while quality >= 20:
+        buffer.seek(0)
+        buffer.truncate()
+        img.save(buffer, format='JPEG', quality=quality, optimize=False, progressive=False)
+        jpeg_bytes = buffer.getvalue()
+
+        if len(jpeg_bytes) <= SCREENSHOT_MAX_BYTES:
+            break
+        quality -= 10
+
+    logger.info(f"[Sandbox] Screenshot compressed: {original_size} -> {len(jpeg_bytes)} bytes (quality={quality}, size={img.width}x{img.height})")
+    return jpeg_bytes
+
+
+async def _is_reachable(url: str, timeout: float) -> bool:
+    """Check that something accepts TCP connections at the URL's host/port"""
+    parsed = urlparse(url)
+    port = parsed.port or (443 if parsed.scheme == "https" else 80)
+    try:
+        _, writer = await asyncio.wait_for(
+            asyncio.open_connection(parsed.hostname, port), timeout=timeout
+        )
+    except (OSError, asyncio.TimeoutError):
+        return False
+    writer.close()
+    return True
+
+
 # ============================================
 # Terminal Process Wrapper
 # ============================================
@@ -179,7 +379,7 @@ class TerminalProcess:
     """Wrapper for a running terminal process"""
     session: TerminalSession
     process: Optional[asyncio.subprocess.Process] = None
-    output_buffer: List[str] = field(default_factory=list)
+    output_buffer: deque = field(default_factory=lambda: deque(maxlen=MAX_OUTPUT_LINES))
     on_output: Optional[Callable[[str], None]] = None
     _read_tasks: List[asyncio.Task] = field(default_factory=list)
 
@@ -206,12 +406,9 @@ class TerminalProcess:
                     break
 
                 decoded = line.decode("utf-8", errors="replace")
+                # Bounded deque drops the oldest line once MAX_OUTPUT_LINES is reached
                 self.output_buffer.append(decoded)
 
-                # Trim buffer if too large
-                if len(self.output_buffer) > MAX_OUTPUT_LINES:
-                    self.output_buffer = self.output_buffer[-MAX_OUTPUT_LINES:]
-
                 # Callback for real-time streaming
                 if self.on_output:
                     self.on_output(decoded)
@@ -260,12 +457,30 @@ class BoxLiteSandboxManager:
     def __init__(self, sandbox_id: Optional[str] = None):
         self.sandbox_id = sandbox_id or f"sandbox-{uuid.uuid4().hex[:12]}"
         self.work_dir = Path(SANDBOX_BASE_DIR) / self.sandbox_id
+        self.snapshot_path = Path(SANDBOX_BASE_DIR) / SNAPSHOT_DIR / f"{self.sandbox_id}.json"
         self.state = SandboxState(sandbox_id=self.sandbox_id)
         self.terminals: Dict[str, TerminalProcess] = {}
         self.dev_server_process: Optional[TerminalProcess] = None
         self._output_callbacks: List[Callable[[ProcessOutput], None]] = []
         self._initialized = False
         self._lock = asyncio.Lock()
+        self._snapshot_task: Optional[asyncio.Task] = None
+        # path -> (mtime_ns, size) of the disk file at the time state.files got
+        # its content (read or written); the snapshot persists these stamps
+        self._file_stamps: Dict[str, tuple] = {}
+        # path -> (mtime_ns, size, is_text) from _looks_like_text, so unchanged
+        # files without a text extension aren't re-sniffed on every walk
+        self._sniffed: Dict[str, tuple] = {}
+        # Bumped by _mark_state_changed on every mutation; keys derived caches
+        self._state_version = 0
+        # (created_at monotonic, (preview_url, state_version), VisualSummary)
+        self._vs_cache: Optional[tuple] = None
+        # Long-lived Playwright browser for visual summaries (lazy-started)
+        self._playwright = None
+        self._browser = None
+        self._browser_uses = 0
+        self._browser_active = 0
+        self._browser_lock = asyncio.Lock()
 
     # ============================================
     # Lifecycle Methods
@@ -378,6 +593,8 @@ class BoxLiteSandboxManager:
 
             # Clear state files
             self.state.files.clear()
+            self._file_stamps.clear()
+            self._discard_snapshot()
 
             # Write default files
             for path, content in DEFAULT_FILES.items():
@@ -385,6 +602,8 @@ class BoxLiteSandboxManager:
                 file_path.parent.mkdir(parents=True, exist_ok=True)
                 file_path.write_text(content, encoding="utf-8")
                 self.state.files[f"/{path}"] = content
+                self._record_stamp(f"/{path}", file_path)
+            self._mark_state_changed()
 
             self.state.status = SandboxStatus.READY
             self._initialized = True
@@ -405,40 +624,175 @@ class BoxLiteSandboxManager:
 
         return self.state
 
+    def _iter_disk_files(self):
+        """Yield (state_path, DirEntry) for every visible file in work_dir
+
+        Iterative os.scandir walk: DirEntry caches the file type, so telling
+        files from directories costs no extra syscalls. Hidden entries and
+        SKIP_DIRS (plus ROOT_SKIP_DIRS at the top level) are never descended
+        into, symlinked directories are not followed, and files over
+        MAX_SYNC_FILE_SIZE or that look binary are left out. The binary sniff
+        result is reused while a file's (mtime_ns, size) is unchanged.
+        """
+        previous = self._sniffed
+        sniffed: Dict[str, tuple] = {}
+        stack = [(str(self.work_dir), "")]
+        while stack:
+            dir_path, prefix = stack.pop()
+            skip_dirs = SKIP_DIRS if prefix else SKIP_DIRS | ROOT_SKIP_DIRS
+            try:
+                with os.scandir(dir_path) as it:
+                    for entry in it:
+                        name = entry.name
+                        if name.startswith(".") or name in skip_dirs:
+                            continue
+
+                        rel_path = f"{prefix}/{name}"
+                        if entry.is_file():
+                            st = entry.stat()
+                            if st.st_size > MAX_SYNC_FILE_SIZE:
+                                continue
+                            if os.path.splitext(name)[1].lower() not in TEXT_EXTENSIONS:
+                                cached = previous.get(rel_path)
+                                if cached is not None and cached[:2] == (st.st_mtime_ns, st.st_size):
+                                    is_text = cached[2]
+                                else:
+                                    is_text = _looks_like_text(entry.path)
+                                sniffed[rel_path] = (st.st_mtime_ns, st.st_size, is_text)
+                                if not is_text:
+                                    continue
+                            yield rel_path, entry
+                        elif entry.is_dir(follow_symlinks=False):
+                            stack.append((entry.path, rel_path))
+            except OSError as e:
+                logger.error(f"Error scanning directory {dir_path}: {e}")
+        # Only a complete walk replaces the cache, which also drops removed files
+        self._sniffed = sniffed
+
     async def _scan_files_from_disk(self):
-        """Scan all files from disk to state.files (disk is SSOT)"""
+        """Scan all files from disk to state.files (disk is SSOT)
+
+        Files whose (mtime_ns, size) still match the persisted snapshot are
+        taken from it instead of being re-read. Without a snapshot this is
+        a full scan.
+        """
+        snapshot = self._load_snapshot()
+        reused = 0
         self.state.files.clear()
+        self._file_stamps.clear()
+
+        for rel_path, entry in self._iter_disk_files():
+            st = entry.stat()
+            stamp = (st.st_mtime_ns, st.st_size)
+            cached = snapshot.get(rel_path)
+            if cached is not None and stamp == (cached[0], cached[1]):
+                self.state.files[rel_path] = cached[2]
+                self._file_stamps[rel_path] = stamp
+                reused += 1
+                continue
 
-        def scan_dir(dir_path: Path, prefix: str = ""):
             try:
-                for item in dir_path.iterdir():
-                    # Skip hidden files and node_modules
-                    if item.name.startswith(".") or item.name == "node_modules":
-                        continue
-
-                    rel_path = f"{prefix}/{item.name}"
-                    if item.is_file():
-                        try:
-                            # Only read text files
-                            content = item.read_text(encoding="utf-8")
-                            self.state.files[rel_path] = content
-                        except UnicodeDecodeError:
-                            # Skip binary files
-                            pass
-                        except Exception as e:
-                            logger.warning(f"Failed to read file {rel_path}: {e}")
-                    elif item.is_dir():
-                        scan_dir(item, rel_path)
+                # Only read text files
+                self.state.files[rel_path] = _read_text_file(entry.path, st.st_size)
+                self._file_stamps[rel_path] = stamp
+            except UnicodeDecodeError:
+                # Skip binary files
+                pass
             except Exception as e:
-                logger.error(f"Error scanning directory {dir_path}: {e}")
+                logger.warning(f"Failed to read file {rel_path}: {e}")
+
+        logger.info(f"Scanned {len(self.state.files)} files from disk ({reused} from snapshot)")
+        self._schedule_snapshot()
+
+    # ============================================
+    # State Snapshot
+    # ============================================
+
+    def _load_snapshot(self) -> Dict[str, List[Any]]:
+        """Load the persisted files snapshot: path -> [mtime_ns, size, content]
+
+        Returns an empty dict when the snapshot is missing or unreadable.
+        """
+        snapshot_path = self.snapshot_path
+        try:
+            with open(snapshot_path, "rb") as f:
+                data = json.loads(f.read())
+            if data.get("version") != SNAPSHOT_VERSION:
+                return {}
+            return data.get("files", {})
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable snapshot {snapshot_path}: {e}")
+            return {}
+
+    def _write_snapshot(self, files: Dict[str, str], stamps: Dict[str, tuple]):
+        """Persist files with the (mtime_ns, size) stamps taken when their content was read or written
+
+        Files without a stamp are left out and re-read on the next scan. The
+        disk is never stat'ed here: a stamp taken now could vouch for content
+        that went stale since it was cached.
+        """
+        entries = {}
+        for rel_path, content in files.items():
+            stamp = stamps.get(rel_path)
+            if stamp is not None:
+                entries[rel_path] = [stamp[0], stamp[1], content]
+
+        snapshot_path = self.snapshot_path
+        snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = snapshot_path.with_name(snapshot_path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": SNAPSHOT_VERSION, "files": entries}, f)
+        os.replace(tmp_path, snapshot_path)
+
+    def _discard_snapshot(self):
+        """Remove the persisted snapshot (and cancel a pending write)"""
+        if self._snapshot_task and not self._snapshot_task.done():
+            self._snapshot_task.cancel()
+        try:
+            self.snapshot_path.unlink()
+        except FileNotFoundError:
+            pass
+
+    def _record_stamp(self, state_path: str, disk_path: Path):
+        """Remember the disk stamp of a file whose content state.files now holds"""
+        try:
+            st = os.stat(disk_path)
+        except OSError:
+            self._file_stamps.pop(state_path, None)
+            return
+        self._file_stamps[state_path] = (st.st_mtime_ns, st.st_size)
+
+    def _schedule_snapshot(self):
+        """Debounce a snapshot write after file changes"""
+        if self._snapshot_task and not self._snapshot_task.done():
+            return  # A pending write will pick up this change too
+        try:
+            self._snapshot_task = asyncio.get_running_loop().create_task(self._flush_snapshot_later())
+        except RuntimeError:
+            pass  # No running loop (sync caller); next async change will snapshot
 
-        scan_dir(self.work_dir)
-        logger.info(f"Scanned {len(self.state.files)} files from disk")
+    async def _flush_snapshot_later(self):
+        await asyncio.sleep(SNAPSHOT_DEBOUNCE)
+        if not self.work_dir.exists():
+            return
+        try:
+            await asyncio.to_thread(self._write_snapshot, dict(self.state.files), dict(self._file_stamps))
+        except Exception as e:
+            logger.warning(f"Failed to write sandbox snapshot: {e}")
 
     async def cleanup(self):
         """Cleanup sandbox resources"""
         logger.info(f"Cleaning up sandbox: {self.sandbox_id}")
 
+        try:
+            self._discard_snapshot()
+        except OSError as e:
+            logger.warning(f"Failed to remove sandbox snapshot: {e}")
+
+        await self._close_browser()
+
         # Stop all terminal processes
         for terminal in list(self.terminals.values()):
             await terminal.stop()
@@ -472,7 +826,10 @@ class BoxLiteSandboxManager:
     # ============================================
 
     async def write_file(self, path: str, content: str) -> bool:
-        """Write content to a file"""
+        """Write content to a file, creating missing parent directories
+
+        Callers don't need a separate mkdir step (e.g. a `mkdir -p` command).
+        """
         import threading
         try:
             # Normalize path
@@ -494,7 +851,9 @@ class BoxLiteSandboxManager:
             # Update state
             state_path = f"/{normalized}"
             self.state.files[state_path] = content
-            self.state.updated_at = datetime.now()
+            self._record_stamp(state_path, file_path)
+            self._mark_state_changed()
+            self._schedule_snapshot()
 
             logger.info(f"[write_file] ✓ Wrote {path} ({len(content)} chars)")
             return True
@@ -510,9 +869,12 @@ class BoxLiteSandboxManager:
             file_path = self.work_dir / normalized
 
             if file_path.exists() and file_path.is_file():
+                # Stamp before reading: a change during the read then shows up as stale
+                st = file_path.stat()
                 content = file_path.read_text(encoding="utf-8")
                 # Update cache
                 self.state.files[f"/{normalized}"] = content
+                self._file_stamps[f"/{normalized}"] = (st.st_mtime_ns, st.st_size)
                 return content
 
             return None
@@ -536,7 +898,9 @@ class BoxLiteSandboxManager:
             # Update state
             state_path = f"/{normalized}"
             self.state.files.pop(state_path, None)
-            self.state.updated_at = datetime.now()
+            self._file_stamps.pop(state_path, None)
+            self._mark_state_changed()
+            self._schedule_snapshot()
 
             return True
 
@@ -609,6 +973,12 @@ class BoxLiteSandboxManager:
             new_state = f"/{new_normalized}"
             if old_state in self.state.files:
                 self.state.files[new_state] = self.state.files.pop(old_state)
+                # rename() keeps mtime and size, so the stamp still holds
+                stamp = self._file_stamps.pop(old_state, None)
+                if stamp is not None:
+                    self._file_stamps[new_state] = stamp
+            self._mark_state_changed()
+            self._schedule_snapshot()
 
             return True
 
@@ -618,24 +988,20 @@ class BoxLiteSandboxManager:
 
     async def sync_files_to_state(self):
         """Sync file system to state"""
+        previous = dict(self.state.files)
         self.state.files.clear()
+        self._file_stamps.clear()
 
-        def scan_dir(dir_path: Path, prefix: str = ""):
-            for item in dir_path.iterdir():
-                if item.name.startswith(".") or item.name == "node_modules":
-                    continue
-
-                rel_path = f"{prefix}/{item.name}"
-                if item.is_file():
-                    try:
-                        content = item.read_text(encoding="utf-8")
-                        self.state.files[rel_path] = content
-                    except Exception:
-                        pass  # Skip binary files
-                elif item.is_dir():
-                    scan_dir(item, rel_path)
+        for rel_path, entry in self._iter_disk_files():
+            st = entry.stat()
+            try:
+                self.state.files[rel_path] = _read_text_file(entry.path, st.st_size)
+                self._file_stamps[rel_path] = (st.st_mtime_ns, st.st_size)
+            except Exception:
+                pass  # Skip binary files
 
-        scan_dir(self.work_dir)
+        if self.state.files != previous:
+            self._mark_state_changed()
 
     # ============================================
     # Command Execution
@@ -648,7 +1014,13 @@ class BoxLiteSandboxManager:
         timeout: float = DEFAULT_TIMEOUT,
         background: bool = False
     ) -> CommandResult:
-        """Execute a shell command"""
+        """Execute a shell command
+
+        When args are given as a list and contain no shell syntax, the
+        command is exec'd directly instead of going through /bin/sh.
+        A bare command string always runs through the shell.
+        """
+        use_exec = bool(args) and not _needs_shell([command] + args)
         args = args or []
         full_command = [command] + args
         cmd_str = " ".join(full_command)
@@ -666,12 +1038,10 @@ class BoxLiteSandboxManager:
                     command=cmd_str
                 )
 
-                process = await asyncio.create_subprocess_shell(
+                process = await self._spawn(
+                    full_command if use_exec else None,
                     cmd_str,
-                    cwd=str(self.work_dir),
-                    stdout=asyncio.subprocess.PIPE,
-                    stderr=asyncio.subprocess.STDOUT,
-                    env={**os.environ, "NODE_ENV": "development"}
+                    stderr=asyncio.subprocess.STDOUT
                 )
 
                 term_process = TerminalProcess(
@@ -681,7 +1051,8 @@ class BoxLiteSandboxManager:
                 )
                 term_process.start_reading()
                 self.terminals[terminal_id] = term_process
-                self.state.terminals.append(session)
+                self.state.terminals[session.id] = session
+                self._mark_state_changed()
 
                 return CommandResult(
                     success=True,
@@ -693,12 +1064,10 @@ class BoxLiteSandboxManager:
 
             # Foreground command
             start = datetime.now()
-            process = await asyncio.create_subprocess_shell(
+            process = await self._spawn(
+                full_command if use_exec else None,
                 cmd_str,
-                cwd=str(self.work_dir),
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-                env={**os.environ, "NODE_ENV": "development"}
+                stderr=asyncio.subprocess.PIPE
             )
 
             try:
@@ -708,6 +1077,7 @@ class BoxLiteSandboxManager:
                 )
             except asyncio.TimeoutError:
                 process.kill()
+                self._mark_state_changed()  # May have changed files before timing out
                 return CommandResult(
                     success=False,
                     exit_code=-1,
@@ -717,6 +1087,8 @@ class BoxLiteSandboxManager:
                 )
 
             duration = (datetime.now() - start).total_seconds() * 1000
+            # The command may have changed files (sed, npm install, codegen...)
+            self._mark_state_changed()
 
             return CommandResult(
                 success=process.returncode == 0,
@@ -736,6 +1108,26 @@ class BoxLiteSandboxManager:
                 duration_ms=0
             )
 
+    async def _spawn(self, argv: Optional[List[str]], cmd_str: str, stderr: int) -> asyncio.subprocess.Process:
+        """Start a command in the sandbox, exec'ing argv directly when given
+
+        argv[0] is resolved on PATH first. On Windows (npm is npm.cmd there)
+        or when it isn't found, the command goes through the shell instead,
+        which also reports a missing program as exit code 127 like before.
+        """
+        env = {**os.environ, "NODE_ENV": "development"}
+        kwargs = dict(
+            cwd=str(self.work_dir),
+            stdout=asyncio.subprocess.PIPE,
+            stderr=stderr,
+            env=env
+        )
+        if argv and sys.platform != "win32":
+            program = shutil.which(argv[0], path=env.get("PATH"))
+            if program:
+                return await asyncio.create_subprocess_exec(program, *argv[1:], **kwargs)
+        return await asyncio.create_subprocess_shell(cmd_str, **kwargs)
+
     async def install_dependencies(self, packages: Optional[List[str]] = None, dev: bool = False) -> CommandResult:
         """Install npm packages"""
         if packages:
@@ -758,11 +1150,10 @@ class BoxLiteSandboxManager:
         for attempt in range(max_attempts):
             try:
                 # Find ALL processes using the port using lsof
-                find_cmd = f"lsof -ti:{port}"
-                logger.debug(f"[KillPort] Running: {find_cmd}")
+                logger.debug(f"[KillPort] Running: lsof -ti:{port}")
 
-                find_result = await asyncio.create_subprocess_shell(
-                    find_cmd,
+                find_result = await asyncio.create_subprocess_exec(
+                    "lsof", f"-ti:{port}",
                     stdout=asyncio.subprocess.PIPE,
                     stderr=asyncio.subprocess.PIPE
                 )
@@ -780,11 +1171,10 @@ class BoxLiteSandboxManager:
                 # Kill all processes using kill -9
                 for pid in pids:
                     try:
-                        kill_cmd = f"kill -9 {pid}"
-                        logger.info(f"[KillPort] Running: {kill_cmd}")
+                        logger.info(f"[KillPort] Running: kill -9 {pid}")
 
-                        kill_result = await asyncio.create_subprocess_shell(
-                            kill_cmd,
+                        kill_result = await asyncio.create_subprocess_exec(
+                            "kill", "-9", pid,
                             stdout=asyncio.subprocess.PIPE,
                             stderr=asyncio.subprocess.PIPE
                         )
@@ -797,9 +1187,9 @@ class BoxLiteSandboxManager:
                     except Exception as e:
                         logger.warning(f"[KillPort] Failed to kill PID {pid}: {e}")
 
-                # Wait for processes to actually die
-                logger.info(f"[KillPort] Waiting 1.5s for processes to die...")
-                await asyncio.sleep(1.5)
+                # Wait for processes to actually die (returns as soon as the port binds)
+                logger.info(f"[KillPort] Waiting up to 1.5s for port {port} to be released...")
+                await _wait_port_free(port, timeout=1.5)
 
             except Exception as e:
                 logger.error(f"[KillPort] Error on attempt {attempt + 1}: {e}")
@@ -807,24 +1197,12 @@ class BoxLiteSandboxManager:
 
         # Final verification
         logger.info(f"[KillPort] Final verification for port {port}...")
-        try:
-            check_result = await asyncio.create_subprocess_shell(
-                f"lsof -ti:{port}",
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            stdout, _ = await check_result.communicate()
-            remaining_pids = stdout.decode().strip()
+        if await _wait_port_free(port, timeout=1.0):
+            logger.info(f"[KillPort] SUCCESS: Port {port} is now free")
+            return True
 
-            if not remaining_pids:
-                logger.info(f"[KillPort] SUCCESS: Port {port} is now free")
-                return True
-            else:
-                logger.error(f"[KillPort] FAILED: Port {port} still has PIDs: {remaining_pids}")
-                return False
-        except Exception as e:
-            logger.error(f"[KillPort] Final check error: {e}")
-            return False
+        logger.error(f"[KillPort] FAILED: Port {port} is still in use")
+        return False
 
     _dev_server_starting: bool = False  # Prevent concurrent starts
 
@@ -876,7 +1254,7 @@ class BoxLiteSandboxManager:
                 logger.info(f"[DevServer] Removing old terminal: {tid}")
                 await self.terminals[tid].stop()
                 del self.terminals[tid]
-                self.state.terminals = [t for t in self.state.terminals if t.id != tid]
+                self.state.terminals.pop(tid, None)
 
             # STEP 1: Kill port 8080 - MUST succeed before continuing
             logger.info(f"[DevServer] Step 1: Killing port {DEV_SERVER_PORT}...")
@@ -913,9 +1291,10 @@ class BoxLiteSandboxManager:
                     duration_ms=0
                 )
 
-            # Wait extra time for port to be fully released (TIME_WAIT state)
-            logger.info(f"[DevServer] Waiting 2s for port {DEV_SERVER_PORT} to be fully released...")
-            await asyncio.sleep(2)
+            # Make sure the port is bindable before Vite starts (strictPort fails otherwise)
+            logger.info(f"[DevServer] Waiting for port {DEV_SERVER_PORT} to be bindable...")
+            if not await _wait_port_free(DEV_SERVER_PORT, timeout=2.0):
+                logger.warning(f"[DevServer] Port {DEV_SERVER_PORT} still not bindable, starting anyway")
 
             # STEP 4: Start dev server in background
             logger.info("[DevServer] Step 4: Running npm run dev...")
@@ -935,6 +1314,7 @@ class BoxLiteSandboxManager:
                 self.state.preview_url = f"http://localhost:{DEV_SERVER_PORT}"
                 self.state.preview = PreviewState(url=self.state.preview_url)
                 self.state.status = SandboxStatus.RUNNING
+                self._mark_state_changed()
                 logger.info(f"[DevServer] ========== STARTED ON PORT {DEV_SERVER_PORT} ==========")
 
             return result
@@ -950,6 +1330,7 @@ class BoxLiteSandboxManager:
             self.state.preview_url = None
             self.state.preview = PreviewState()
             self.state.status = SandboxStatus.READY
+            self._mark_state_changed()
             return True
         return False
 
@@ -986,8 +1367,9 @@ class BoxLiteSandboxManager:
         term_process.start_reading()
 
         self.terminals[terminal_id] = term_process
-        self.state.terminals.append(session)
+        self.state.terminals[session.id] = session
         self.state.active_terminal_id = terminal_id
+        self._mark_state_changed()
 
         return session
 
@@ -1015,7 +1397,8 @@ class BoxLiteSandboxManager:
         del self.terminals[terminal_id]
 
         # Remove from state
-        self.state.terminals = [t for t in self.state.terminals if t.id != terminal_id]
+        self.state.terminals.pop(terminal_id, None)
+        self._mark_state_changed()
 
         return True
 
@@ -1025,7 +1408,8 @@ class BoxLiteSandboxManager:
         if not term:
             return []
 
-        return term.output_buffer[-lines:]
+        buffer = term.output_buffer
+        return list(itertools.islice(buffer, max(0, len(buffer) - lines), None))
 
     # ============================================
     # Preview / Build Error Detection
@@ -1085,8 +1469,8 @@ class BoxLiteSandboxManager:
                 has_content=False,
                 visible_element_count=0,
                 text_preview="",
-                viewport={"width": 1280, "height": 720},
-                body_size={"width": 1280, "height": 720},
+                viewport=SUMMARY_VIEWPORT,
+                body_size=SUMMARY_VIEWPORT,
                 preview_url=None,
                 page_title=page_title,
                 visible_text=None,
@@ -1094,89 +1478,72 @@ class BoxLiteSandboxManager:
                 error="Preview server not started"
             )
 
-        try:
-            from playwright.async_api import async_playwright
-            import base64
+        # Reuse a recent summary when neither the files nor the preview URL changed
+        cache_key = (preview_url, self._state_version)
+        if self._vs_cache is not None:
+            created_at, key, cached = self._vs_cache
+            if key == cache_key and time.monotonic() - created_at < VISUAL_SUMMARY_TTL:
+                return cached
 
-            async with async_playwright() as p:
-                browser = await p.chromium.launch(headless=True)
-                # Use smaller viewport for smaller screenshots
+        # Fail fast when the dev server is down instead of waiting out page.goto's 15s timeout
+        if not await _is_reachable(preview_url, PREVIEW_PROBE_TIMEOUT):
+            return VisualSummary(
+                has_content=False,
+                visible_element_count=0,
+                text_preview="",
+                viewport=SUMMARY_VIEWPORT,
+                body_size=SUMMARY_VIEWPORT,
+                preview_url=preview_url,
+                page_title=page_title,
+                visible_text=None,
+                screenshot_base64=None,
+                error="Preview server not reachable"
+            )
+
+        try:
+            browser = await self._acquire_browser()
+            try:
+                # Use smaller viewport for smaller screenshots, rendered directly at the target size
                 context = await browser.new_context(
-                    viewport={"width": 1024, "height": 768}
+                    viewport=SCREENSHOT_VIEWPORT,
+                    device_scale_factor=SCREENSHOT_SCALE,
                 )
-                page = await context.new_page()
-
                 try:
-                    # Navigate to preview URL
-                    await page.goto(preview_url, timeout=15000, wait_until='networkidle')
-
-                    # Get page title
-                    page_title = await page.title() or "Nexting Agent Project"
-
-                    # Get visible text (first 1000 chars)
-                    visible_text = await page.evaluate('''() => {
-                        return document.body?.innerText?.substring(0, 1000) || '';
-                    }''')
-
-                    # Count visible elements
-                    visible_element_count = await page.evaluate('''() => {
-                        return document.querySelectorAll('*').length;
-                    }''')
-
-                    # Take screenshot as PNG first (Playwright doesn't support JPEG resize well)
-                    screenshot_bytes = await page.screenshot(
-                        type='png',
-                        full_page=False  # Just viewport
-                    )
+                    page = await context.new_page()
 
-                    # Compress with Pillow - aggressive compression to avoid context overflow
+                    # Navigate to preview URL. Don't wait for 'networkidle': Vite's HMR
+                    # websocket keeps the network busy, so it often ran into the timeout.
+                    await page.goto(preview_url, timeout=15000, wait_until='domcontentloaded')
+                    # DOMContentLoaded fires before a client-rendered app mounts; wait
+                    # for content in #root, falling back to 'load' for other pages
                     try:
-                        from PIL import Image
-                        import io
-
-                        img = Image.open(io.BytesIO(screenshot_bytes))
-                        original_size = len(screenshot_bytes)
-
-                        # Resize to max 600px width (more aggressive than 800px)
-                        max_width = 600
-                        max_height = 800  # Also limit height to avoid tall screenshots
-
-                        # Calculate resize ratio
-                        width_ratio = max_width / img.width if img.width > max_width else 1
-                        height_ratio = max_height / img.height if img.height > max_height else 1
-                        ratio = min(width_ratio, height_ratio)
-
-                        if ratio < 1:
-                            new_size = (int(img.width * ratio), int(img.height * ratio))
-                            img = img.resize(new_size, Image.LANCZOS)
-
-                        # Convert to JPEG with aggressive compression
-                        # Start with quality 50, reduce if still too large
-                        quality = 50
-                        max_bytes = 50000  # 50KB limit for base64 (about 67KB after encoding)
-
-                        while quality >= 20:
-                            buffer = io.BytesIO()
-                            img.convert('RGB').save(buffer, format='JPEG', quality=quality, optimize=True)
-                            screenshot_bytes = buffer.getvalue()
-
-                            if len(screenshot_bytes) <= max_bytes:
-                                break
-                            quality -= 10
-
-                        logger.info(f"[Sandbox] Screenshot compressed: {original_size} -> {len(screenshot_bytes)} bytes (quality={quality}, size={img.width}x{img.height})")
-                    except ImportError:
-                        logger.warning("[Sandbox] Pillow not available, using raw PNG")
-
-                    screenshot_base64 = base64.b64encode(screenshot_bytes).decode('utf-8')
+                        await page.wait_for_selector(
+                            RENDER_READY_SELECTOR, state='attached', timeout=RENDER_READY_TIMEOUT
+                        )
+                    except Exception as e:
+                        logger.debug(f"[Sandbox] No content in #root yet, waiting for 'load': {e}")
+                        try:
+                            await page.wait_for_load_state('load', timeout=3000)
+                        except Exception as e:
+                            logger.debug(f"[Sandbox] Page 'load' not reached, capturing anyway: {e}")
 
-                    logger.info(f"[Sandbox] Screenshot captured: {len(screenshot_bytes)} bytes")
+                    # Page info (title, visible text, element count) and the screenshot
+                    # are independent once the page has rendered - fetch them concurrently
+                    info, screenshot_base64 = await asyncio.gather(
+                        page.evaluate(PAGE_INFO_SCRIPT),
+                        self._capture_screenshot(context, page),
+                    )
+                    page_title = info["title"] or "Nexting Agent Project"
+                    visible_text = info["text"]
+                    visible_element_count = info["count"]
 
                 except Exception as e:
                     error = f"Failed to capture screenshot: {str(e)}"
                     logger.warning(f"[Sandbox] Screenshot error: {e}")
-
-                await browser.close()
+                finally:
+                    await context.close()
+            finally:
+                self._browser_active -= 1
 
         except ImportError:
             error = "Playwright not installed. Run: pip install playwright && playwright install chromium"
@@ -1185,18 +1552,120 @@ class BoxLiteSandboxManager:
             error = f"Screenshot failed: {str(e)}"
             logger.error(f"[Sandbox] Screenshot error: {e}")
 
-        return VisualSummary(
+        summary = VisualSummary(
             has_content=screenshot_base64 is not None,
             visible_element_count=visible_element_count,
             text_preview=visible_text[:200] if visible_text else "",
-            viewport={"width": 1280, "height": 720},
-            body_size={"width": 1280, "height": 720},
+            viewport=SUMMARY_VIEWPORT,
+            body_size=SUMMARY_VIEWPORT,
             preview_url=preview_url,
             page_title=page_title,
             visible_text=visible_text,
             screenshot_base64=screenshot_base64,
             error=error
         )
+        # Only successful captures are cached; errors should be retried
+        self._vs_cache = (time.monotonic(), cache_key, summary) if error is None else None
+        return summary
+
+    async def _capture_screenshot(self, context, page) -> str:
+        """Capture the page as base64 JPEG, preferring the CDP fast path"""
+        screenshot_base64 = await self._capture_jpeg_cdp(context, page)
+        if screenshot_base64 is not None:
+            logger.info(f"[Sandbox] Screenshot captured via CDP: ~{len(screenshot_base64) * 3 // 4} bytes")
+            return screenshot_base64
+        return await self._capture_png_compressed(page)
+
+    async def _capture_jpeg_cdp(self, context, page) -> Optional[str]:
+        """Capture a downscaled JPEG with CDP Page.captureScreenshot
+
+        Chromium encodes the JPEG itself (no PNG encode + Pillow re-encode)
+        and returns it base64-encoded. Returns None when CDP isn't available
+        or the result is over SCREENSHOT_MAX_BYTES, so the caller can fall
+        back to the Pillow path.
+        """
+        width = SCREENSHOT_VIEWPORT["width"]
+        height = SCREENSHOT_VIEWPORT["height"]
+
+        try:
+            cdp = await context.new_cdp_session(page)
+            result = await cdp.send("Page.captureScreenshot", {
+                "format": "jpeg",
+                "quality": SCREENSHOT_QUALITY,
+                "optimizeForSpeed": True,
+                "clip": {"x": 0, "y": 0, "width": width, "height": height, "scale": 1},
+            })
+        except Exception as e:
+            logger.debug(f"[Sandbox] CDP screenshot unavailable, falling back to Pillow: {e}")
+            return None
+
+        data = result.get("data")
+        if not data or len(data) * 3 // 4 > SCREENSHOT_MAX_BYTES:
+            return None
+        return data
+
+    async def _capture_png_compressed(self, page) -> str:
+        """Capture a PNG screenshot and compress it to JPEG with Pillow"""
+        # Take screenshot as PNG first; the context's device scale already sized it
+        screenshot_bytes = await page.screenshot(
+            type='png',
+            full_page=False  # Just viewport
+        )
+
+        # Compress with Pillow off the event loop - resize + JPEG encode is CPU-heavy
+        try:
+            screenshot_bytes = await asyncio.to_thread(_compress_screenshot, screenshot_bytes)
+        except ImportError:
+            logger.warning("[Sandbox] Pillow not available, using raw PNG")
+
+        logger.info(f"[Sandbox] Screenshot captured: {len(screenshot_bytes)} bytes")
+        # Single C-level encode straight to ASCII (CDP path above is already base64)
+        return b2a_base64(screenshot_bytes, newline=False).decode('ascii')
+
+    async def _acquire_browser(self):
+        """Get the shared Chromium browser, launching or recycling it as needed
+
+        Launching Chromium dominates screenshot time, so one browser is kept
+        per sandbox and each capture only opens a fresh context. The browser
+        is relaunched every BROWSER_RECYCLE_AFTER uses (when idle) to cap
+        Chromium memory growth. Callers must decrement _browser_active when
+        done.
+        """
+        async with self._browser_lock:
+            if self._browser is not None and self._browser_active == 0 and (
+                self._browser_uses >= BROWSER_RECYCLE_AFTER or not self._browser.is_connected()
+            ):
+                await self._close_browser()
+
+            if self._browser is None:
+                from playwright.async_api import async_playwright
+
+                logger.info("[Sandbox] Launching screenshot browser...")
+                self._playwright = await async_playwright().start()
+                self._browser = await self._playwright.chromium.launch(
+                    headless=True,
+                    args=["--no-sandbox", "--disable-dev-shm-usage"]
+                )
+                self._browser_uses = 0
+
+            self._browser_uses += 1
+            self._browser_active += 1
+            return self._browser
+
+    async def _close_browser(self):
+        """Close the shared screenshot browser if running"""
+        if self._browser:
+            try:
+                await self._browser.close()
+            except Exception as e:
+                logger.warning(f"[Sandbox] Failed to close browser: {e}")
+            self._browser = None
+        if self._playwright:
+            try:
+                await self._playwright.stop()
+            except Exception as e:
+                logger.warning(f"[Sandbox] Failed to stop Playwright: {e}")
+            self._playwright = None
 
     # ============================================
     # Callbacks and Events
@@ -1235,10 +1704,18 @@ class BoxLiteSandboxManager:
     # ============================================
 
     def get_state(self) -> SandboxState:
-        """Get current sandbox state"""
-        self.state.updated_at = datetime.now()
+        """Get current sandbox state
+
+        Read-only: updated_at reflects the last actual change (see
+        _mark_state_changed), not the time of this call.
+        """
         return self.state
 
+    def _mark_state_changed(self):
+        """Record a state mutation: bump the version and refresh updated_at"""
+        self._state_version += 1
+        self.state.updated_at = datetime.now()
+
     def get_state_dict(self) -> Dict[str, Any]:
         """Get state as dictionary
 
@@ -1250,34 +1727,48 @@ class BoxLiteSandboxManager:
         return self.state.model_dump(mode="json")
 
     def _sync_files_from_disk(self):
-        """Sync files from disk to state (synchronous version for get_state_dict)"""
+        """Sync files from disk to state (synchronous version for get_state_dict)
+
+        Incremental: files whose (mtime_ns, size) match the last sync keep
+        their cached content, only changed files are re-read, and files no
+        longer on disk are dropped. Any added, changed or removed file
+        marks the state changed.
+        """
         if not self.work_dir.exists():
             return
 
-        self.state.files.clear()
+        files = self.state.files
+        stamps = self._file_stamps
+        seen = set()
+        changed = False
 
-        def scan_dir(dir_path: Path, prefix: str = ""):
-            try:
-                for item in dir_path.iterdir():
-                    # Skip hidden files and node_modules
-                    if item.name.startswith(".") or item.name == "node_modules":
-                        continue
+        for rel_path, entry in self._iter_disk_files():
+            seen.add(rel_path)
+            st = entry.stat()
+            stamp = (st.st_mtime_ns, st.st_size)
+            if stamps.get(rel_path) == stamp and rel_path in files:
+                continue
 
-                    rel_path = f"{prefix}/{item.name}"
-                    if item.is_file():
-                        try:
-                            content = item.read_text(encoding="utf-8")
-                            self.state.files[rel_path] = content
-                        except UnicodeDecodeError:
-                            pass  # Skip binary files
-                        except Exception:
-                            pass
-                    elif item.is_dir():
-                        scan_dir(item, rel_path)
+            try:
+                content = _read_text_file(entry.path, st.st_size)
+                stamps[rel_path] = stamp
+                if files.get(rel_path) != content:
+                    files[rel_path] = content
+                    changed = True
+            except UnicodeDecodeError:
+                if files.pop(rel_path, None) is not None:  # Skip binary files
+                    changed = True
             except Exception:
                 pass
 
-        scan_dir(self.work_dir)
+        removed = [p for p in files if p not in seen]
+        for rel_path in removed:
+            del files[rel_path]
+        for rel_path in [p for p in stamps if p not in seen]:
+            del stamps[rel_path]
+
+        if changed or removed:
+            self._mark_state_changed()
 
 
 # ============================================
@@ -23,7 +23,8 @@ Usage:
 
 from __future__ import annotations
 import logging
-from typing import Dict, Any, Optional, List
+from collections import deque, defaultdict
+from typing import Dict, Any, Optional, Deque, Set
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
@@ -38,7 +39,7 @@ class InvocationPolicy(Enum):
     UNLIMITED = "unlimited"                 # No restrictions
 
 
-@dataclass
+@dataclass(slots=True)
 class InvocationRecord:
     """Record of a tool invocation"""
     tool_name: str
@@ -48,6 +49,10 @@ class InvocationRecord:
     success: bool = True
 
 
+# Invocation records kept per tool (older ones are dropped)
+MAX_HISTORY_PER_TOOL = 64
+
+
 # Tool policies configuration
 TOOL_POLICIES: Dict[str, InvocationPolicy] = {
     "spawn_section_workers": InvocationPolicy.ONCE_PER_SOURCE,
@@ -90,7 +95,10 @@ class ToolInvocationGuard:
 
     def __init__(self):
         """Initialize the guard with empty invocation history"""
-        self._invocations: Dict[str, List[InvocationRecord]] = {}
+        self._invocations: Dict[str, Deque[InvocationRecord]] = {}
+        # tool_name -> source_ids with a successful invocation (O(1) policy checks,
+        # unaffected by history trimming)
+        self._succeeded_sources: Dict[str, Set[Optional[str]]] = defaultdict(set)
         self._current_source_id: Optional[str] = None
         logger.info("[ToolGuard] Initialized")
 
@@ -149,12 +157,11 @@ class ToolInvocationGuard:
         elif policy == InvocationPolicy.ONCE_PER_SOURCE:
             # Check if invoked for this specific source
             effective_source = source_id or self._current_source_id
-            for record in history:
-                if record.source_id == effective_source and record.success:
-                    logger.warning(
-                        f"[ToolGuard] Blocking {tool_name}: already invoked for source {effective_source}"
-                    )
-                    return False
+            if effective_source in self._succeeded_sources.get(tool_name, ()):
+                logger.warning(
+                    f"[ToolGuard] Blocking {tool_name}: already invoked for source {effective_source}"
+                )
+                return False
             return True
 
         return True
@@ -183,10 +190,12 @@ class ToolInvocationGuard:
             success=success,
         )
 
-        if tool_name not in self._invocations:
-            self._invocations[tool_name] = []
-
-        self._invocations[tool_name].append(record)
+        # Bounded per tool so long-lived sessions don't grow without limit
+        self._invocations.setdefault(
+            tool_name, deque(maxlen=MAX_HISTORY_PER_TOOL)
+        ).append(record)
+        if success:
+            self._succeeded_sources[tool_name].add(record.source_id)
 
         logger.info(
             f"[ToolGuard] Marked {tool_name} as invoked "
@@ -249,11 +258,13 @@ class ToolInvocationGuard:
             tool_name: Specific tool to reset (None = reset all)
         """
         if tool_name:
+            self._succeeded_sources.pop(tool_name, None)
             if tool_name in self._invocations:
                 del self._invocations[tool_name]
                 logger.info(f"[ToolGuard] Reset invocation history for {tool_name}")
         else:
             self._invocations.clear()
+            self._succeeded_sources.clear()
             logger.info("[ToolGuard] Reset all invocation history")
 
     def get_status_summary(self) -> str:
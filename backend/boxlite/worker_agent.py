@@ -11,19 +11,25 @@ Key differences from WebContainer Worker Agent:
 
 from __future__ import annotations
 import os
+import sys
 import json
 import logging
 import asyncio
-from typing import Dict, Any, List, Optional, Callable, Awaitable
+import random
+import time
+import importlib.util
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Callable, Awaitable, Sequence, NamedTuple
 from dataclasses import dataclass, field
-from datetime import datetime
-
-import anthropic
-from openai import AsyncOpenAI, APIError as OpenAIAPIError
 
 from .sandbox_manager import BoxLiteSandboxManager
 from . import boxlite_tools
 
+try:
+    import orjson
+except ImportError:  # Optional speedup - fall back to the stdlib json module
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
 
@@ -69,12 +75,114 @@ MODEL_MAX_TOKENS = {
 }
 
 
+class ModelCaps(NamedTuple):
+    """Per-model limits, resolved once per model name"""
+    max_tokens: int
+
+
+@lru_cache(maxsize=32)
+def _get_model_caps(model: str) -> ModelCaps:
+    """Get the capabilities/limits for a specific model"""
+    return ModelCaps(
+        max_tokens=MODEL_MAX_TOKENS.get(model, MODEL_MAX_TOKENS["default"]),
+    )
+
+
 def _get_max_tokens_for_model(model: str) -> int:
     """Get max_tokens limit for a specific model"""
-    return MODEL_MAX_TOKENS.get(model, MODEL_MAX_TOKENS["default"])
+    return _get_model_caps(model).max_tokens
+
+
+# anthropic / openai are imported lazily by the client that's actually used,
+# so a worker on the OpenAI proxy path never loads the Anthropic SDK (and vice versa)
+
+def _is_sdk_api_error(e: Exception, module_name: str) -> bool:
+    """Check if e is an APIError from an SDK, without importing the SDK"""
+    module = sys.modules.get(module_name)
+    return module is not None and isinstance(e, module.APIError)
+
+
+def _strip_messages_suffix(url: str) -> str:
+    """Turn a full '/v1/messages' endpoint URL into the SDK base URL (case-insensitive)"""
+    url = url.rstrip("/")
+    lowered = url.lower()
+    for suffix in ("/v1/messages", "/messages"):
+        if lowered.endswith(suffix):
+            return url[:-len(suffix)]
+    return url
+
+
+def _json_dumps(obj: Any) -> str:
+    """Compact JSON for API payloads (tool arguments carry the whole generated file)"""
+    if orjson is not None:
+        return orjson.dumps(obj).decode("utf-8")
+    return json.dumps(obj, ensure_ascii=False)
+
+
+def _json_loads(data: str) -> Any:
+    """Parse JSON; orjson's JSONDecodeError subclasses json.JSONDecodeError"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+# Styles are only shown up to this many characters in the system prompt
+STYLES_PROMPT_LIMIT = 2000
+
+_styles_encoder = json.JSONEncoder(ensure_ascii=False, indent=2)
+
+
+def _truncated_json(obj: Any, limit: int) -> str:
+    """json.dumps(obj, indent=2)[:limit] + "..." if longer, without encoding the rest
+
+    Stops pulling chunks from the streaming encoder once past the limit.
+    """
+    chunks = []
+    size = 0
+    for chunk in _styles_encoder.iterencode(obj):
+        chunks.append(chunk)
+        size += len(chunk)
+        if size > limit:
+            return "".join(chunks)[:limit] + "..."
+    return "".join(chunks)
+
+
+# API clients shared by all workers, keyed by (sdk, api_key, base_url, timeout).
+# Each client owns an httpx connection pool, so sharing one means parallel workers
+# reuse the same connections instead of each opening (and TLS-handshaking) their own.
+_CLIENT_CACHE: Dict[tuple, Any] = {}
+
+# HTTP/2 lets parallel workers multiplex requests over a few connections;
+# httpx needs the optional h2 package for it (pip install "httpx[http2]")
+_HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+def _get_shared_client(sdk: str, api_key: str, base_url: Optional[str] = None, timeout: Optional[float] = None):
+    """Get (or create on first use) the shared AsyncAnthropic/AsyncOpenAI client"""
+    key = (sdk, api_key, base_url, timeout)
+    client = _CLIENT_CACHE.get(key)
+    if client is None:
+        kwargs: Dict[str, Any] = {"api_key": api_key}
+        if base_url is not None:
+            kwargs["base_url"] = base_url
+        if timeout is not None:
+            kwargs["timeout"] = timeout
+
+        if sdk == "anthropic":
+            import anthropic
+            if _HTTP2_AVAILABLE:
+                kwargs["http_client"] = anthropic.DefaultAsyncHttpxClient(http2=True)
+            client = anthropic.AsyncAnthropic(**kwargs)
+        else:
+            import openai
+            if _HTTP2_AVAILABLE:
+                kwargs["http_client"] = openai.DefaultAsyncHttpxClient(http2=True)
+            client = openai.AsyncOpenAI(**kwargs)
+        _CLIENT_CACHE[key] = client
+    return client
 
 
-@dataclass
+@dataclass(slots=True)
 class BoxLiteWorkerConfig:
     """
     BoxLite Worker configuration
@@ -95,6 +203,12 @@ class BoxLiteWorkerConfig:
     max_tokens: int = 8192
     max_iterations: int = 30
 
+    # Backoff between retries after API errors: exponential, capped, with jitter
+    # (1.0 = full jitter) so parallel workers don't retry in lockstep
+    retry_base_delay: float = 1.0
+    retry_max_delay: float = 60.0
+    retry_jitter: float = 1.0
+
     # Display name for UI
     display_name: str = ""
 
@@ -108,7 +222,7 @@ class WorkerErrorType:
     UNKNOWN = "unknown"
 
 
-@dataclass
+@dataclass(slots=True)
 class BoxLiteWorkerResult:
     """
     BoxLite Worker result - returned to Master for file writing
@@ -142,7 +256,8 @@ class BoxLiteWorkerResult:
 # Worker has ONLY ONE tool: write_code
 # Writing code auto-completes the task - no separate complete_task needed
 # This prevents workers from claiming completion without actually writing files
-WORKER_TOOLS = [
+# Tuple so the same frozen object is passed to every API call
+WORKER_TOOLS = (
     {
         "name": "write_code",
         "description": "Write React component code for your assigned section. This tool writes the file AND automatically marks the task complete. You MUST call this tool with actual code content.",
@@ -160,15 +275,98 @@ WORKER_TOOLS = [
             },
             "required": ["path", "content"]
         }
-    }
-]
+    },
+)
+
+
+def _to_openai_tools(tools: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Convert Anthropic tool definitions to OpenAI function tools"""
+    return [
+        {
+            "type": "function",
+            "function": {
+                "name": t["name"],
+                "description": t["description"],
+                "parameters": t["input_schema"],
+            }
+        }
+        for t in tools
+    ]
 
 
-def get_worker_tools() -> List[Dict[str, Any]]:
+# Precomputed once - the proxy path would otherwise rebuild it on every iteration
+WORKER_TOOLS_OPENAI = _to_openai_tools(WORKER_TOOLS)
+
+
+def get_worker_tools() -> Sequence[Dict[str, Any]]:
     """Get tool definitions for worker agents"""
     return WORKER_TOOLS
 
 
+# ============================================
+# System Prompt Template
+# ============================================
+
+# Fixed parts of the worker system prompt, built once at import.
+# _build_system_prompt only formats the per-section pieces between them.
+_SYSTEM_PROMPT_HEAD = """You are an **HTML → JSX CONVERTER**, NOT a content creator.
+
+## ⛔ CRITICAL RULE: YOU ARE A CONVERTER, NOT A CREATOR
+
+**YOU MUST NOT:**
+- ❌ Create new content, text, or URLs
+- ❌ Imagine what the section "should" look like
+- ❌ Use placeholder text like "Lorem ipsum" or "Sample text"
+- ❌ Use placeholder URLs like "https://example.com"
+- ❌ Add features not in the original HTML
+- ❌ Simplify or summarize the content
+
+**YOU MUST:**
+- ✅ Convert the provided HTML to JSX syntax EXACTLY
+- ✅ Keep ALL text content word-for-word
+- ✅ Keep ALL URLs exactly as they appear (they are already absolute)
+- ✅ Keep ALL class names, IDs, and attributes
+- ✅ Convert HTML attributes to JSX (class → className, for → htmlFor, etc.)
+
+"""
+
+_SYSTEM_PROMPT_RULES = """## 🔄 CONVERSION RULES
+
+| HTML | JSX |
+|------|-----|
+| `class="..."` | `className="..."` |
+| `for="..."` | `htmlFor="..."` |
+| `onclick="..."` | `onClick={...}` |
+| `<img src="...">` | `<img src="..." />` |
+| `<!--comment-->` | `{/* comment */}` |
+| `style="color: red"` | `style={{ color: 'red' }}` |
+
+## 🎮 INTERACTIVE ELEMENTS
+
+If you see interactive elements (modals, dropdowns, accordions, mobile menus, etc.), you may add `useState` to make them functional. For modals/popups, default to hidden state so they don't block content.
+
+**CRITICAL**: If a component can be closed (modal, popup, banner, notification, etc.), it MUST have working close functionality. Look for close buttons (×, X, close icons) and add `onClick` handlers. A closeable element that cannot be closed is broken.
+
+## 🛠️ YOUR TOOL
+
+**write_code(path, content)**: Write your React component. This auto-completes the task.
+
+"""
+
+_SYSTEM_PROMPT_CHECKLIST = """## ⚠️ VALIDATION CHECKLIST
+
+Before calling write_code, verify your code:
+1. [ ] All image `src` URLs are kept exactly as they appear in the HTML (they are already absolute)
+2. [ ] All link `href` URLs are kept exactly as they appear in the HTML (they are already absolute)
+3. [ ] All text content matches HTML word-for-word
+4. [ ] No placeholder content added
+5. [ ] No made-up URLs - use only the URLs that appear in the provided HTML
+
+**IMPORTANT**: Call `write_code` with your COMPLETE React component code. This will write the file AND complete your task.
+
+**BEGIN NOW**: Convert the HTML to JSX and call write_code."""
+
+
 # ============================================
 # Mock Classes (for OpenAI proxy)
 # ============================================
@@ -237,6 +435,22 @@ class BoxLiteWorkerAgent:
         self.on_text_delta = on_text_delta
         self.on_file_written = on_file_written  # NEW: real-time file sync
 
+        # Progress callbacks are queued and run in order by one background task,
+        # so a slow frontend doesn't stall the agent loop; drained by run()
+        self._callback_queue: Optional[asyncio.Queue] = None
+        self._callback_consumer: Optional[asyncio.Task] = None
+
+        # OpenAI proxy path: converted form of the current attempt's messages list
+        self._openai_source: Optional[List[Dict[str, Any]]] = None
+        self._openai_messages: List[Dict[str, Any]] = []
+        self._openai_converted = 0
+
+        # (tools, converted) for a non-default tool list on the OpenAI proxy path
+        self._openai_tools_cache: Optional[tuple] = None
+
+        # Tools started while a response is still streaming (tool_use id -> task)
+        self._pending_tools: Dict[str, asyncio.Task] = {}
+
         # Initialize API client
         self._init_claude_client()
 
@@ -250,6 +464,11 @@ class BoxLiteWorkerAgent:
         self.namespace = self._generate_namespace()
         self.base_path = "/src/components/sections"
 
+        # Derived once - section_name never changes for a worker
+        self.component_name = self._get_component_name()
+        self.component_path = f"{self.base_path}/{self.namespace}/{self.component_name}.jsx"
+        self._expected_prefix = f"{self.base_path}/{self.namespace}/"
+
         logger.info(f"BoxLiteWorkerAgent initialized: {self.worker_id} (namespace: {self.namespace})")
 
     def _generate_namespace(self) -> str:
@@ -269,23 +488,18 @@ class BoxLiteWorkerAgent:
 
     def _normalize_path(self, path: str) -> str:
         """Normalize and validate path, relocating if outside namespace"""
-        original_path = path
-
-        # Ensure leading slash
-        if not path.startswith("/"):
-            path = "/" + path
+        expected_prefix = self._expected_prefix
 
-        # Expected prefix for this worker
-        expected_prefix = f"{self.base_path}/{self.namespace}/"
+        if path.startswith(expected_prefix):
+            return path
+        if path[:1] != "/" and ("/" + path).startswith(expected_prefix):
+            # Same path, just missing the leading slash
+            return "/" + path
 
-        if not path.startswith(expected_prefix):
-            # Extract filename and put it in correct location
-            filename = path.split("/")[-1]
-            corrected_path = f"{self.base_path}/{self.namespace}/{filename}"
-            logger.warning(f"Worker {self.worker_id}: Path '{original_path}' outside namespace, relocated to '{corrected_path}'")
-            return corrected_path
-
-        return path
+        # Extract filename and put it in correct location
+        corrected_path = expected_prefix + path.rpartition("/")[2]
+        logger.warning(f"Worker {self.worker_id}: Path '{path}' outside namespace, relocated to '{corrected_path}'")
+        return corrected_path
 
     def _init_claude_client(self):
         """Initialize Claude API client"""
@@ -300,20 +514,14 @@ class BoxLiteWorkerAgent:
                 raise ValueError("CLAUDE_PROXY_API_KEY not set")
 
             if "/messages" in proxy_base_url.lower():
-                import re
-                base_url = re.sub(r'/v1/messages', '', proxy_base_url, flags=re.IGNORECASE)
-                base_url = re.sub(r'/messages', '', base_url, flags=re.IGNORECASE)
-                self.anthropic_client = anthropic.AsyncAnthropic(
-                    api_key=proxy_api_key,
-                    base_url=base_url,
-                    timeout=120.0,
+                base_url = _strip_messages_suffix(proxy_base_url)
+                self.anthropic_client = _get_shared_client(
+                    "anthropic", proxy_api_key, base_url=base_url, timeout=120.0
                 )
                 self.openai_client = None
             else:
-                self.openai_client = AsyncOpenAI(
-                    api_key=proxy_api_key,
-                    base_url=proxy_base_url,
-                    timeout=120.0,
+                self.openai_client = _get_shared_client(
+                    "openai", proxy_api_key, base_url=proxy_base_url, timeout=120.0
                 )
                 self.anthropic_client = None
 
@@ -331,7 +539,7 @@ class BoxLiteWorkerAgent:
             if not api_key:
                 raise ValueError("ANTHROPIC_API_KEY not set")
 
-            self.anthropic_client = anthropic.AsyncAnthropic(api_key=api_key)
+            self.anthropic_client = _get_shared_client("anthropic", api_key)
             self.openai_client = None
 
     # ============================================
@@ -351,7 +559,16 @@ class BoxLiteWorkerAgent:
         Returns:
             BoxLiteWorkerResult with generated files (path -> content)
         """
-        start_time = datetime.now()
+        try:
+            return await self._run(max_retries)
+        finally:
+            self._cancel_pending_tools()
+            # Deliver every progress event before the caller reports completion
+            await self._drain_callbacks()
+
+    async def _run(self, max_retries: int) -> BoxLiteWorkerResult:
+        """Retry loop behind run()"""
+        start_time = time.perf_counter()
         retry_count = 0
         last_error = None
         last_error_type = WorkerErrorType.UNKNOWN
@@ -369,7 +586,7 @@ class BoxLiteWorkerAgent:
 
         if not self.config.context_data:
             logger.warning(f"Worker {self.worker_id}: No context data provided")
-            duration_ms = int((datetime.now() - start_time).total_seconds() * 1000)
+            duration_ms = int((time.perf_counter() - start_time) * 1000)
             return BoxLiteWorkerResult(
                 worker_id=self.worker_id,
                 section_name=self.section_name,
@@ -386,7 +603,7 @@ class BoxLiteWorkerAgent:
         # Check if we have HTML content
         if len(raw_html) < 10:
             logger.error(f"[Worker {self.worker_id}] ⚠️ HTML content too short: {len(raw_html)} chars")
-            duration_ms = int((datetime.now() - start_time).total_seconds() * 1000)
+            duration_ms = int((time.perf_counter() - start_time) * 1000)
             return BoxLiteWorkerResult(
                 worker_id=self.worker_id,
                 section_name=self.section_name,
@@ -400,6 +617,9 @@ class BoxLiteWorkerAgent:
                 retry_count=0,
             )
 
+        # System prompt is the same for every attempt - only the user prompt mentions retries
+        system_prompt = self._build_system_prompt()
+
         # Retry loop
         while retry_count <= max_retries:
             try:
@@ -409,7 +629,6 @@ class BoxLiteWorkerAgent:
                     self._reset_state()
 
                 # Build prompts
-                system_prompt = self._build_system_prompt()
                 messages = [{
                     "role": "user",
                     "content": self._build_initial_prompt(retry_attempt=retry_count)
@@ -435,7 +654,7 @@ class BoxLiteWorkerAgent:
                     continue
 
                 # Success!
-                duration_ms = int((datetime.now() - start_time).total_seconds() * 1000)
+                duration_ms = int((time.perf_counter() - start_time) * 1000)
 
                 logger.info(f"[Worker {self.worker_id}] SUCCESS! Files to return: {list(self.files.keys())}")
                 logger.info(f"[Worker {self.worker_id}] Files dict type: {type(self.files)}, len: {len(self.files)}")
@@ -456,26 +675,29 @@ class BoxLiteWorkerAgent:
 
                 return result
 
-            except anthropic.APIError as e:
-                last_error = f"API Error: {str(e)}"
-                last_error_type = WorkerErrorType.API_ERROR
-                logger.error(f"Worker {self.worker_id} API error: {e}")
-                retry_count += 1
-
-            except OpenAIAPIError as e:
-                last_error = f"Proxy API Error: {str(e)}"
-                last_error_type = WorkerErrorType.API_ERROR
-                logger.error(f"Worker {self.worker_id} proxy API error: {e}")
-                retry_count += 1
-
             except Exception as e:
-                last_error = str(e)
-                last_error_type = WorkerErrorType.UNKNOWN
-                logger.error(f"Worker {self.worker_id} error: {e}", exc_info=True)
+                if _is_sdk_api_error(e, "anthropic"):
+                    last_error = f"API Error: {str(e)}"
+                    last_error_type = WorkerErrorType.API_ERROR
+                    logger.error(f"Worker {self.worker_id} API error: {e}")
+                elif _is_sdk_api_error(e, "openai"):
+                    last_error = f"Proxy API Error: {str(e)}"
+                    last_error_type = WorkerErrorType.API_ERROR
+                    logger.error(f"Worker {self.worker_id} proxy API error: {e}")
+                else:
+                    last_error = str(e)
+                    last_error_type = WorkerErrorType.UNKNOWN
+                    logger.error(f"Worker {self.worker_id} error: {e}", exc_info=True)
+
+                # Back off before retrying transient API errors (not on the last attempt)
+                if last_error_type == WorkerErrorType.API_ERROR and retry_count < max_retries:
+                    delay = self._retry_delay(retry_count)
+                    logger.info(f"Worker {self.worker_id}: Backing off {delay:.2f}s before retry")
+                    await asyncio.sleep(delay)
                 retry_count += 1
 
         # All retries exhausted
-        duration_ms = int((datetime.now() - start_time).total_seconds() * 1000)
+        duration_ms = int((time.perf_counter() - start_time) * 1000)
         logger.error(f"Worker {self.worker_id}: All {max_retries} retries exhausted. Last error: {last_error}")
 
         return BoxLiteWorkerResult(
@@ -491,9 +713,16 @@ class BoxLiteWorkerAgent:
             retry_count=retry_count,
         )
 
+    def _retry_delay(self, retry_count: int) -> float:
+        """Exponential backoff with jitter for the given (0-based) attempt"""
+        cap = min(self.config.retry_max_delay, self.config.retry_base_delay * 2 ** retry_count)
+        return cap * (1 - self.config.retry_jitter * random.random())
+
     def _reset_state(self):
         """Reset worker state for retry attempt"""
-        self.files = {}
+        self._cancel_pending_tools()
+        self.files.clear()  # Keep the same dict object across attempts
+        self._openai_source = None
         self.is_complete = False
         self.completion_summary = ""
         self.iteration_count = 0
@@ -508,8 +737,8 @@ class BoxLiteWorkerAgent:
 
         Worker doesn't query data - all data is directly injected into prompt
         """
-        component_name = self._get_component_name()
-        full_path = f"{self.base_path}/{self.namespace}/{component_name}.jsx"
+        component_name = self.component_name
+        full_path = self.component_path
 
         # Get section data from context
         # Note: All URLs in raw_html have been pre-resolved to absolute URLs by BoxLiteMCPExecutor
@@ -549,35 +778,16 @@ Simply use them exactly as they appear in the HTML - no conversion needed.
         # Build styles section
         styles_section = ""
         if styles:
-            styles_json = json.dumps(styles, ensure_ascii=False, indent=2)
+            styles_json = _truncated_json(styles, STYLES_PROMPT_LIMIT)
             styles_section = f"""
 ## 🎨 STYLES
 
 ```json
-{styles_json[:2000]}{"..." if len(styles_json) > 2000 else ""}
+{styles_json}
 ```
 """
 
-        return f"""You are an **HTML → JSX CONVERTER**, NOT a content creator.
-
-## ⛔ CRITICAL RULE: YOU ARE A CONVERTER, NOT A CREATOR
-
-**YOU MUST NOT:**
-- ❌ Create new content, text, or URLs
-- ❌ Imagine what the section "should" look like
-- ❌ Use placeholder text like "Lorem ipsum" or "Sample text"
-- ❌ Use placeholder URLs like "https://example.com"
-- ❌ Add features not in the original HTML
-- ❌ Simplify or summarize the content
-
-**YOU MUST:**
-- ✅ Convert the provided HTML to JSX syntax EXACTLY
-- ✅ Keep ALL text content word-for-word
-- ✅ Keep ALL URLs exactly as they appear (they are already absolute)
-- ✅ Keep ALL class names, IDs, and attributes
-- ✅ Convert HTML attributes to JSX (class → className, for → htmlFor, etc.)
-
-## 📋 YOUR ASSIGNMENT
+        assignment = f"""## 📋 YOUR ASSIGNMENT
 
 - **Section**: `{self.section_name}`
 - **Namespace**: `{self.namespace}`
@@ -591,28 +801,9 @@ Simply use them exactly as they appear in the HTML - no conversion needed.
 ✅ ALLOWED: `{full_path}`
 ❌ FORBIDDEN: `/src/App.jsx`, `/src/main.jsx`, `/package.json`
 
-## 🔄 CONVERSION RULES
-
-| HTML | JSX |
-|------|-----|
-| `class="..."` | `className="..."` |
-| `for="..."` | `htmlFor="..."` |
-| `onclick="..."` | `onClick={{...}}` |
-| `<img src="...">` | `<img src="..." />` |
-| `<!--comment-->` | `{{/* comment */}}` |
-| `style="color: red"` | `style={{{{ color: 'red' }}}}` |
-
-## 🎮 INTERACTIVE ELEMENTS
-
-If you see interactive elements (modals, dropdowns, accordions, mobile menus, etc.), you may add `useState` to make them functional. For modals/popups, default to hidden state so they don't block content.
-
-**CRITICAL**: If a component can be closed (modal, popup, banner, notification, etc.), it MUST have working close functionality. Look for close buttons (×, X, close icons) and add `onClick` handlers. A closeable element that cannot be closed is broken.
-
-## 🛠️ YOUR TOOL
-
-**write_code(path, content)**: Write your React component. This auto-completes the task.
+"""
 
-{html_section}{media_section}{styles_section}
+        output_format = f"""
 
 ## ✅ REQUIRED OUTPUT FORMAT
 
@@ -628,18 +819,18 @@ export default function {component_name}() {{
 }}
 ```
 
-## ⚠️ VALIDATION CHECKLIST
-
-Before calling write_code, verify your code:
-1. [ ] All image `src` URLs are kept exactly as they appear in the HTML (they are already absolute)
-2. [ ] All link `href` URLs are kept exactly as they appear in the HTML (they are already absolute)
-3. [ ] All text content matches HTML word-for-word
-4. [ ] No placeholder content added
-5. [ ] No made-up URLs - use only the URLs that appear in the provided HTML
-
-**IMPORTANT**: Call `write_code` with your COMPLETE React component code. This will write the file AND complete your task.
+"""
 
-**BEGIN NOW**: Convert the HTML to JSX and call write_code."""
+        return "".join((
+            _SYSTEM_PROMPT_HEAD,
+            assignment,
+            _SYSTEM_PROMPT_RULES,
+            html_section,
+            media_section,
+            styles_section,
+            output_format,
+            _SYSTEM_PROMPT_CHECKLIST,
+        ))
 
     def _build_initial_prompt(self, retry_attempt: int = 0) -> str:
         """
@@ -648,8 +839,8 @@ Before calling write_code, verify your code:
         Args:
             retry_attempt: Current retry attempt number (0 = first attempt)
         """
-        component_name = self._get_component_name()
-        full_path = f"{self.base_path}/{self.namespace}/{component_name}.jsx"
+        component_name = self.component_name
+        full_path = self.component_path
 
         # Get data stats from context
         section_data = self.config.context_data.get("section_data", {})
@@ -692,6 +883,57 @@ Do NOT just respond with text - you MUST call the write_code tool.
     # Agent Loop
     # ============================================
 
+    def _fire_callback(self, label: str, callback: Optional[Callable[..., Awaitable[None]]], *args):
+        """Queue an event callback; callbacks run in the order they were fired"""
+        if not callback:
+            return
+
+        if self._callback_consumer is None:
+            self._callback_queue = asyncio.Queue()
+            self._callback_consumer = asyncio.create_task(self._consume_callbacks(self._callback_queue))
+        self._callback_queue.put_nowait((label, callback, args))
+
+    async def _consume_callbacks(self, queue: asyncio.Queue):
+        """Await queued callbacks one at a time; errors are logged, not raised"""
+        while True:
+            label, callback, args = await queue.get()
+            try:
+                await callback(*args)
+            except Exception as e:
+                logger.warning(f"{label} callback error: {e}")
+            finally:
+                queue.task_done()
+
+    def _start_tool(self, block) -> asyncio.Task:
+        """Emit the tool call event and start executing a tool_use block"""
+        self._fire_callback(
+            "Tool call",
+            self.on_tool_call,
+            self.worker_id,
+            self.section_name,
+            block.name,
+            block.input,
+        )
+        return asyncio.create_task(self._execute_tool(block.name, block.input))
+
+    def _cancel_pending_tools(self):
+        """Cancel tools started during streaming that will never be awaited"""
+        for task in self._pending_tools.values():
+            task.cancel()
+        self._pending_tools.clear()
+
+    async def _drain_callbacks(self):
+        """Wait for queued event callbacks so none outlive the worker"""
+        consumer = self._callback_consumer
+        if consumer is None:
+            return
+        try:
+            await self._callback_queue.join()
+        finally:
+            consumer.cancel()
+            self._callback_consumer = None
+            self._callback_queue = None
+
     async def _agent_loop(
         self,
         system_prompt: str,
@@ -705,100 +947,103 @@ Do NOT just respond with text - you MUST call the write_code tool.
             logger.debug(f"Worker {self.worker_id} iteration {self.iteration_count}")
 
             # Emit iteration event
-            if self.on_iteration:
-                try:
-                    await self.on_iteration(
-                        self.worker_id,
-                        self.section_name,
-                        self.iteration_count,
-                        self.config.max_iterations,
-                    )
-                except Exception as e:
-                    logger.warning(f"Iteration callback error: {e}")
+            self._fire_callback(
+                "Iteration",
+                self.on_iteration,
+                self.worker_id,
+                self.section_name,
+                self.iteration_count,
+                self.config.max_iterations,
+            )
 
             try:
-                # Call Claude API
+                # Call Claude API (the direct Anthropic path streams, see _call_anthropic_direct)
+                streamed = self.anthropic_client is not None
                 response = await self._call_claude(system_prompt, messages, tools)
 
-                # Process response
+                # Process response: one pass records the assistant turn, then tools run
                 assistant_content = []
-                has_tool_use = False
+                tool_blocks = []
+                first_text = None  # For the no-tool-use diagnostic below
 
                 for block in response.content:
                     if block.type == "text":
+                        if first_text is None:
+                            first_text = block.text
                         assistant_content.append({
                             "type": "text",
                             "text": block.text,
                         })
 
-                        # Emit text delta
-                        if self.on_text_delta:
-                            try:
-                                await self.on_text_delta(
-                                    self.worker_id,
-                                    self.section_name,
-                                    block.text,
-                                    self.iteration_count,
-                                )
-                            except Exception as e:
-                                logger.warning(f"Text delta callback error: {e}")
+                        # Emit text delta (streamed responses already emitted it incrementally)
+                        if not streamed:
+                            self._fire_callback(
+                                "Text delta",
+                                self.on_text_delta,
+                                self.worker_id,
+                                self.section_name,
+                                block.text,
+                                self.iteration_count,
+                            )
 
                         # Note: is_complete is set by write_code tool, not text detection
 
                     elif block.type == "tool_use":
-                        has_tool_use = True
-
                         assistant_content.append({
                             "type": "tool_use",
                             "id": block.id,
                             "name": block.name,
                             "input": block.input,
                         })
+                        tool_blocks.append(block)
+
+                has_tool_use = bool(tool_blocks)
+                tool_results = []
+
+                for block in tool_blocks:
+                    # Started as soon as its block finished streaming, or run now
+                    task = self._pending_tools.pop(block.id, None)
+                    if task is None:
+                        task = self._start_tool(block)
+                    tool_result = await task
+
+                    # Emit tool result event
+                    if self.on_tool_result:
+                        result_preview = tool_result[:500] + "..." if len(tool_result) > 500 else tool_result
+                        self._fire_callback(
+                            "Tool result",
+                            self.on_tool_result,
+                            self.worker_id,
+                            self.section_name,
+                            block.name,
+                            result_preview,
+                            True,
+                        )
+
+                    # write_code completed the task - no next turn, so skip the
+                    # remaining tools and the tool_result round-trip messages
+                    if self.is_complete:
+                        break
+
+                    tool_results.append({
+                        "type": "tool_result",
+                        "tool_use_id": block.id,
+                        "content": tool_result,
+                    })
 
-                        # Emit tool call event
-                        if self.on_tool_call:
-                            try:
-                                await self.on_tool_call(
-                                    self.worker_id,
-                                    self.section_name,
-                                    block.name,
-                                    block.input,
-                                )
-                            except Exception as e:
-                                logger.warning(f"Tool call callback error: {e}")
-
-                        # Execute tool directly
-                        tool_result = await self._execute_tool(block.name, block.input)
-
-                        # Emit tool result event
-                        if self.on_tool_result:
-                            try:
-                                result_preview = tool_result[:500] + "..." if len(tool_result) > 500 else tool_result
-                                await self.on_tool_result(
-                                    self.worker_id,
-                                    self.section_name,
-                                    block.name,
-                                    result_preview,
-                                    True,
-                                )
-                            except Exception as e:
-                                logger.warning(f"Tool result callback error: {e}")
-
-                        # Add to messages
-                        messages.append({
-                            "role": "assistant",
-                            "content": assistant_content,
-                        })
-                        messages.append({
-                            "role": "user",
-                            "content": [{
-                                "type": "tool_result",
-                                "tool_use_id": block.id,
-                                "content": tool_result,
-                            }],
-                        })
+                # Tools of a completed turn that were started but are no longer needed
+                self._cancel_pending_tools()
 
-                        assistant_content = []
+                # Add to messages: the whole assistant turn, then all of its tool results
+                if has_tool_use and not self.is_complete:
+                    messages.append({
+                        "role": "assistant",
+                        "content": assistant_content,
+                    })
+                    messages.append({
+                        "role": "user",
+                        "content": tool_results,
+                    })
 
                 # Check if should continue
                 if self.is_complete:
@@ -810,10 +1055,8 @@ Do NOT just respond with text - you MUST call the write_code tool.
                     # Claude didn't call any tools
                     # Log the response for debugging
                     text_preview = ""
-                    for block in response.content:
-                        if block.type == "text":
-                            text_preview = block.text[:200] + "..." if len(block.text) > 200 else block.text
-                            break
+                    if first_text is not None:
+                        text_preview = first_text[:200] + "..." if len(first_text) > 200 else first_text
                     logger.warning(
                         f"[Worker {self.worker_id}] No tool use in response. "
                         f"stop_reason={response.stop_reason}, "
@@ -870,12 +1113,7 @@ Do NOT just respond with text - you MUST call the write_code tool.
         # Normalize and validate path
         path = self._normalize_path(path)
 
-        # Create directory if needed
-        dir_path = "/".join(path.split("/")[:-1])
-        if dir_path:
-            await self.sandbox.run_command(f"mkdir -p {dir_path}")
-
-        # WRITE TO SANDBOX IMMEDIATELY
+        # WRITE TO SANDBOX IMMEDIATELY (write_file creates parent directories itself)
         success = await self.sandbox.write_file(path, content)
 
         if not success:
@@ -909,7 +1147,7 @@ Do NOT just respond with text - you MUST call the write_code tool.
         self,
         system_prompt: str,
         messages: List[Dict[str, Any]],
-        tools: List[Dict[str, Any]],
+        tools: Sequence[Dict[str, Any]],
     ):
         """Call Claude API"""
         if self.anthropic_client:
@@ -921,48 +1159,72 @@ Do NOT just respond with text - you MUST call the write_code tool.
         self,
         system_prompt: str,
         messages: List[Dict[str, Any]],
-        tools: List[Dict[str, Any]],
+        tools: Sequence[Dict[str, Any]],
     ):
-        """Call direct Anthropic API"""
-        return await self.anthropic_client.messages.create(
+        """Call direct Anthropic API
+
+        The system prompt (rules + injected HTML) is identical for every
+        iteration and retry of a worker, so it's marked as a prompt-cache
+        breakpoint; follow-up calls then reuse the cached prefix.
+
+        Streams the response: text deltas go to on_text_delta as they arrive,
+        and each tool_use block starts executing as soon as it's complete
+        (picked up by _agent_loop via self._pending_tools).
+        """
+        async with self.anthropic_client.messages.stream(
             model=self.config.model,
             max_tokens=self.config.max_tokens,
-            system=system_prompt,
+            system=[{
+                "type": "text",
+                "text": system_prompt,
+                "cache_control": {"type": "ephemeral"},
+            }],
             messages=messages,
             tools=tools,
-        )
+        ) as stream:
+            async for event in stream:
+                if event.type == "text":
+                    self._fire_callback(
+                        "Text delta",
+                        self.on_text_delta,
+                        self.worker_id,
+                        self.section_name,
+                        event.text,
+                        self.iteration_count,
+                    )
+                elif event.type == "content_block_stop" and event.content_block.type == "tool_use":
+                    self._pending_tools[event.content_block.id] = self._start_tool(event.content_block)
+
+            return await stream.get_final_message()
 
     async def _call_openai_proxy(
         self,
         system_prompt: str,
         messages: List[Dict[str, Any]],
-        tools: List[Dict[str, Any]],
+        tools: Sequence[Dict[str, Any]],
     ):
-        """Call OpenAI-compatible proxy"""
-        openai_messages = [{"role": "system", "content": system_prompt}]
+        """Call OpenAI-compatible proxy
 
-        for msg in messages:
+        messages only grows within an agent loop, so the converted list is kept
+        and only messages appended since the previous call are converted.
+        """
+        if self._openai_source is not messages:
+            self._openai_source = messages
+            self._openai_messages = [{"role": "system", "content": system_prompt}]
+            self._openai_converted = 0
+        openai_messages = self._openai_messages
+
+        for msg in messages[self._openai_converted:]:
             role = msg.get("role")
             content = msg.get("content")
 
             if isinstance(content, str):
                 openai_messages.append({"role": role, "content": content})
             elif isinstance(content, list):
-                converted = self._convert_content_to_openai(content, role)
-                if converted:
-                    openai_messages.append(converted)
-
-        openai_tools = [
-            {
-                "type": "function",
-                "function": {
-                    "name": t["name"],
-                    "description": t["description"],
-                    "parameters": t["input_schema"],
-                }
-            }
-            for t in tools
-        ]
+                openai_messages.extend(self._convert_content_to_openai(content, role))
+        self._openai_converted = len(messages)
+
+        openai_tools = self._get_openai_tools(tools)
 
         response = await self.openai_client.chat.completions.create(
             model=self.config.model,
@@ -973,12 +1235,25 @@ Do NOT just respond with text - you MUST call the write_code tool.
 
         return self._convert_openai_response(response)
 
+    def _get_openai_tools(self, tools: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """OpenAI form of the tool list, converted at most once per worker"""
+        if tools is WORKER_TOOLS:
+            return WORKER_TOOLS_OPENAI
+        cached = self._openai_tools_cache
+        if cached is None or cached[0] is not tools:
+            cached = self._openai_tools_cache = (tools, _to_openai_tools(tools))
+        return cached[1]
+
     def _convert_content_to_openai(
         self,
         content: List[Dict[str, Any]],
         role: str,
-    ):
-        """Convert Anthropic content to OpenAI format"""
+    ) -> List[Dict[str, Any]]:
+        """Convert Anthropic content to OpenAI format
+
+        Returns a list because one Anthropic user turn carrying several
+        tool_result blocks maps to one OpenAI "tool" message per result.
+        """
         if role == "assistant":
             text_parts = []
             tool_calls = []
@@ -992,31 +1267,35 @@ Do NOT just respond with text - you MUST call the write_code tool.
                         "type": "function",
                         "function": {
                             "name": block.get("name"),
-                            "arguments": json.dumps(block.get("input", {})),
+                            "arguments": _json_dumps(block.get("input", {})),
                         }
                     })
 
             result = {"role": "assistant", "content": " ".join(text_parts) if text_parts else None}
             if tool_calls:
                 result["tool_calls"] = tool_calls
-            return result
+            return [result]
 
         elif role == "user":
-            for block in content:
-                if block.get("type") == "tool_result":
-                    return {
-                        "role": "tool",
-                        "tool_call_id": block.get("tool_use_id"),
-                        "content": block.get("content", ""),
-                    }
+            tool_messages = [
+                {
+                    "role": "tool",
+                    "tool_call_id": block.get("tool_use_id"),
+                    "content": block.get("content", ""),
+                }
+                for block in content
+                if block.get("type") == "tool_result"
+            ]
+            if tool_messages:
+                return tool_messages
 
             text_parts = []
             for block in content:
                 if block.get("type") == "text":
                     text_parts.append(block.get("text", ""))
-            return {"role": "user", "content": " ".join(text_parts)}
+            return [{"role": "user", "content": " ".join(text_parts)}]
 
-        return None
+        return []
 
     def _convert_openai_response(self, response):
         """Convert OpenAI response to Anthropic format"""
@@ -1033,7 +1312,7 @@ Do NOT just respond with text - you MUST call the write_code tool.
         if message.tool_calls:
             for tc in message.tool_calls:
                 try:
-                    input_data = json.loads(tc.function.arguments)
+                    input_data = _json_loads(tc.function.arguments)
                 except json.JSONDecodeError:
                     input_data = {}
 
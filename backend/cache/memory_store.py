@@ -7,8 +7,10 @@ Replaces Supabase database for the open-source version.
 
 Features:
 - Thread-safe operations with Lock
-- TTL-based automatic expiration
-- LRU eviction when max entries exceeded
+- TTL-based automatic expiration, optionally per entry group
+- Short separate TTL for failed results
+- Optional TTL renewal on read
+- LRU eviction when max entries or the byte budget is exceeded
 - Simple CRUD operations
 """
 
@@ -19,6 +21,13 @@ from dataclasses import dataclass, field
 from threading import Lock
 from datetime import datetime
 
+from code_gen_config import (
+    CACHE,
+    CACHE_NEGATIVE_TTL_SECONDS,
+    CACHE_TTL_RENEW_ON_HIT,
+    CACHE_TTL_SECONDS,
+)
+
 
 @dataclass
 class CacheEntry:
@@ -32,11 +41,22 @@ class CacheEntry:
     data: Dict[str, Any]             # Full extraction data
     timestamp: float                 # Unix timestamp when created
     ttl: float = 86400.0            # Time to live in seconds (default 24h)
+    renewed_at: Optional[float] = None  # Unix timestamp of the last TTL renewal
+    expires: float = field(init=False)  # Unix timestamp of expiry, kept in sync
+    _size: Optional[int] = field(default=None, init=False, repr=False)
+
+    def __post_init__(self):
+        self.expires = (self.renewed_at or self.timestamp) + self.ttl
+
+    def renew(self, now: float) -> None:
+        """Restart the TTL from now"""
+        self.renewed_at = now
+        self.expires = now + self.ttl
 
     @property
     def is_expired(self) -> bool:
         """Check if this entry has expired"""
-        return time.time() - self.timestamp >= self.ttl
+        return time.time() >= self.expires
 
     @property
     def created_at(self) -> str:
@@ -46,16 +66,18 @@ class CacheEntry:
     @property
     def expires_at(self) -> str:
         """Get ISO format expiration time"""
-        return datetime.fromtimestamp(self.timestamp + self.ttl).isoformat()
+        return datetime.fromtimestamp(self.expires).isoformat()
 
     @property
     def size_bytes(self) -> int:
-        """Estimate size in bytes"""
-        import json
-        try:
-            return len(json.dumps(self.data, ensure_ascii=False))
-        except:
-            return 0
+        """Estimate size in bytes (computed once)"""
+        if self._size is None:
+            import json
+            try:
+                self._size = len(json.dumps(self.data, ensure_ascii=False))
+            except:
+                self._size = 0
+        return self._size
 
     def to_summary(self) -> Dict[str, Any]:
         """
@@ -98,18 +120,36 @@ class MemoryStore:
     - Thread-safe with Lock
     """
 
-    def __init__(self, max_entries: int = 50, default_ttl: float = 86400.0):
+    def __init__(
+        self,
+        max_entries: int = 50,
+        default_ttl: float = 86400.0,
+        max_bytes: Optional[int] = None,
+        group_ttls: Optional[Dict[str, float]] = None,
+        renew_on_hit: bool = False,
+        negative_ttl: Optional[float] = None,
+    ):
         """
         Initialize memory store
 
         Args:
             max_entries: Maximum number of entries to keep
             default_ttl: Default time-to-live in seconds (24h)
+            max_bytes: Optional budget for the total size_bytes of all entries
+            group_ttls: Optional TTL in seconds per entry group
+            renew_on_hit: Restart an entry's TTL whenever it is read
+            negative_ttl: Optional TTL in seconds for failed results
+                (data with success=False), so they are not kept as long
         """
         self._store: Dict[str, CacheEntry] = {}
         self._lock = Lock()
         self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._total_bytes = 0
         self._default_ttl = default_ttl
+        self._group_ttls = dict(group_ttls or {})
+        self._renew_on_hit = renew_on_hit
+        self._negative_ttl = negative_ttl
 
     def store(
         self,
@@ -117,6 +157,7 @@ class MemoryStore:
         data: Dict[str, Any],
         title: Optional[str] = None,
         ttl: Optional[float] = None,
+        group: Optional[str] = None,
     ) -> str:
         """
         Store extraction result
@@ -127,6 +168,8 @@ class MemoryStore:
             data: Extraction data (full result from Playwright)
             title: Optional page title
             ttl: Optional custom TTL
+            group: Optional entry group whose configured TTL applies
+                (failed results use the negative TTL instead, if set)
 
         Returns:
             Entry ID
@@ -138,23 +181,35 @@ class MemoryStore:
             # Generate unique ID
             entry_id = str(uuid.uuid4())[:8]
 
-            # Evict oldest if at capacity
-            while len(self._store) >= self._max_entries:
-                oldest_id = min(
-                    self._store,
-                    key=lambda k: self._store[k].timestamp
-                )
-                del self._store[oldest_id]
+            if not ttl:
+                if self._negative_ttl and data.get("success") is False:
+                    ttl = self._negative_ttl
+                else:
+                    ttl = self._group_ttls.get(group, self._default_ttl)
 
-            # Create and store entry
-            self._store[entry_id] = CacheEntry(
+            entry = CacheEntry(
                 id=entry_id,
                 url=url,
                 title=title or self._extract_title(data),
                 data=data,
                 timestamp=time.time(),
-                ttl=ttl or self._default_ttl,
+                ttl=ttl,
             )
+            size = entry.size_bytes
+
+            # Evict oldest if at capacity (entry count or byte budget)
+            while self._store and (
+                len(self._store) >= self._max_entries
+                or (self._max_bytes and self._total_bytes + size > self._max_bytes)
+            ):
+                oldest_id = min(
+                    self._store,
+                    key=lambda k: self._store[k].timestamp
+                )
+                self._remove(oldest_id)
+
+            self._store[entry_id] = entry
+            self._total_bytes += size
 
             return entry_id
 
@@ -172,10 +227,12 @@ class MemoryStore:
         with self._lock:
             entry = self._store.get(entry_id)
             if entry and not entry.is_expired:
+                if self._renew_on_hit:
+                    entry.renew(time.time())
                 return entry
             # Clean up if expired
             if entry and entry.is_expired:
-                del self._store[entry_id]
+                self._remove(entry_id)
             return None
 
     def get_by_url(self, url: str) -> Optional[CacheEntry]:
@@ -190,13 +247,17 @@ class MemoryStore:
             Most recent CacheEntry for this URL, or None
         """
         with self._lock:
+            now = time.time()
             matching = [
                 e for e in self._store.values()
-                if e.url == url and not e.is_expired
+                if e.url == url and e.expires > now
             ]
             if not matching:
                 return None
-            return max(matching, key=lambda e: e.timestamp)
+            entry = max(matching, key=lambda e: e.timestamp)
+            if self._renew_on_hit:
+                entry.renew(now)
+            return entry
 
     def list_all(self) -> List[CacheEntry]:
         """
@@ -226,7 +287,7 @@ class MemoryStore:
         """
         with self._lock:
             if entry_id in self._store:
-                del self._store[entry_id]
+                self._remove(entry_id)
                 return True
             return False
 
@@ -241,6 +302,7 @@ class MemoryStore:
         with self._lock:
             count = len(self._store)
             self._store.clear()
+            self._total_bytes = 0
             return count
 
     def stats(self) -> Dict[str, Any]:
@@ -249,11 +311,11 @@ class MemoryStore:
         获取缓存统计信息
         """
         with self._lock:
-            entries = list(self._store.values())
-            total_size = sum(e.size_bytes for e in entries)
+            total_size = self._total_bytes
             return {
-                "total_entries": len(entries),
+                "total_entries": len(self._store),
                 "max_entries": self._max_entries,
+                "max_bytes": self._max_bytes,
                 "total_size_bytes": total_size,
                 "total_size_mb": round(total_size / (1024 * 1024), 2),
                 "default_ttl_hours": self._default_ttl / 3600,
@@ -267,14 +329,20 @@ class MemoryStore:
         Returns:
             Number of entries removed
         """
+        now = time.time()
         expired = [
             k for k, v in self._store.items()
-            if v.is_expired
+            if v.expires <= now
         ]
         for k in expired:
-            del self._store[k]
+            self._remove(k)
         return len(expired)
 
+    def _remove(self, entry_id: str) -> None:
+        """Remove one entry and release its bytes (internal, assumes lock held)"""
+        entry = self._store.pop(entry_id)
+        self._total_bytes -= entry.size_bytes
+
     def _extract_title(self, data: Dict[str, Any]) -> Optional[str]:
         """Extract title from extraction data"""
         if not data:
@@ -290,4 +358,11 @@ class MemoryStore:
 
 # Global singleton instance
 # 全局单例实例
-extraction_cache = MemoryStore(max_entries=50, default_ttl=86400.0)
+extraction_cache = MemoryStore(
+    max_entries=CACHE.max_size,
+    max_bytes=CACHE.max_bytes,
+    default_ttl=float(CACHE_TTL_SECONDS["default"]),
+    group_ttls=CACHE_TTL_SECONDS,
+    renew_on_hit=CACHE_TTL_RENEW_ON_HIT,
+    negative_ttl=float(CACHE_NEGATIVE_TTL_SECONDS),
+)
@@ -28,6 +28,7 @@ class StoreCacheRequest(BaseModel):
     url: str = Field(..., description="Source URL")
     data: Dict[str, Any] = Field(..., description="Extraction data")
     title: Optional[str] = Field(None, description="Page title (optional)")
+    group: Optional[str] = Field(None, description="Cache group selecting the TTL (optional)")
 
 class StoreCacheResponse(BaseModel):
     """Response model for store operation"""
@@ -68,6 +69,7 @@ class CacheStatsResponse(BaseModel):
     """Response model for stats endpoint"""
     total_entries: int
     max_entries: int
+    max_bytes: Optional[int] = None
     total_size_bytes: int
     total_size_mb: float
     default_ttl_hours: float
@@ -91,6 +93,7 @@ async def store_cache(request: StoreCacheRequest):
             url=request.url,
             data=request.data,
             title=request.title,
+            group=request.group,
         )
         return StoreCacheResponse(
             success=True,
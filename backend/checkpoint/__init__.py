@@ -10,6 +10,8 @@ from .checkpoint_store import (
     CheckpointProject,
     Checkpoint,
     checkpoint_store,
+    dump_json,
+    is_valid_id,
 )
 
 __all__ = [
@@ -17,4 +19,6 @@ __all__ = [
     "CheckpointProject",
     "Checkpoint",
     "checkpoint_store",
+    "dump_json",
+    "is_valid_id",
 ]
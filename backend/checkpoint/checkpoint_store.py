@@ -14,18 +14,257 @@ Features:
 
 import os
 import json
+import atexit
 import time
 import uuid
 import shutil
 import re
-from typing import Dict, Any, Optional, List
-from dataclasses import dataclass, field, asdict
+import zlib
+import hashlib
+import struct
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, Any, Optional, List, Tuple
+from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
 import logging
 
+try:
+    import orjson
+except ImportError:  # Optional speedup - fall back to the stdlib json module
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
+# Indented JSON on disk is only for debugging by hand - compact is smaller and faster
+PRETTY_JSON = os.getenv("CHECKPOINT_PRETTY_JSON", "").lower() in ("true", "1", "yes")
+
+
+def dump_json(data: Any) -> bytes:
+    """Serialize to UTF-8 JSON bytes in one call (orjson when available)"""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 if PRETTY_JSON else 0)
+    return json.dumps(
+        data,
+        ensure_ascii=False,
+        indent=2 if PRETTY_JSON else None,
+        separators=None if PRETTY_JSON else (",", ":"),
+    ).encode("utf-8")
+
+
+def _parse_json(raw: bytes) -> Any:
+    """Parse UTF-8 JSON bytes (orjson when available)"""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def _write_json_streamed(f, data: Dict[str, Any]):
+    """
+    Write a JSON object to a binary file, encoding list values (e.g. the
+    conversation) one item at a time so the whole document never sits in
+    memory as a single buffer
+    """
+    if PRETTY_JSON:
+        f.write(dump_json(data))
+        return
+
+    f.write(b"{")
+    for i, (key, value) in enumerate(data.items()):
+        if i:
+            f.write(b",")
+        f.write(dump_json(key))
+        f.write(b":")
+        if isinstance(value, list):
+            f.write(b"[")
+            for j, item in enumerate(value):
+                if j:
+                    f.write(b",")
+                f.write(dump_json(item))
+            f.write(b"]")
+        else:
+            f.write(dump_json(value))
+    f.write(b"}")
+
+
+def _write_file_atomic(path: Path, data: bytes):
+    """
+    Replace path with data so readers see either the old or the new file,
+    never a partial one
+
+    The temp file is opened with O_DSYNC, so its data is on disk before the
+    rename. The directory itself isn't fsync'd, so a power loss right after
+    may still roll back to the old file - but never leave a truncated one.
+    """
+    tmp_path = path.with_name(f"{path.name}.tmp.{os.getpid()}.{uuid.uuid4().hex[:8]}")
+    flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_DSYNC", 0)
+    fd = os.open(tmp_path, flags, 0o644)
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+    except BaseException:
+        os.close(fd)
+        tmp_path.unlink()
+        raise
+    os.close(fd)
+    os.replace(tmp_path, path)
+
+
+def _load_json(path: Path) -> Any:
+    """Read and parse a JSON file"""
+    return _parse_json(path.read_bytes())
+
+
+# Parsed manifests/checkpoints kept in memory by CheckpointStore
+JSON_CACHE_SIZE = 256
+
+
+class _JsonFileCache:
+    """
+    Bounded LRU of parsed JSON files
+    已解析 JSON 文件的 LRU 缓存
+
+    Whole files are validated against (st_mtime_ns, st_size), so a file
+    changed behind our back is re-read. Log records are keyed by
+    (path, offset) - logs are append-only, so a record never changes.
+    Cached values are shared - callers must not mutate them.
+    """
+
+    def __init__(self, capacity: int = JSON_CACHE_SIZE):
+        self.capacity = capacity
+        self._entries: "OrderedDict[Any, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def load(self, path: Path) -> Any:
+        """Return the parsed file; raises FileNotFoundError if it doesn't exist"""
+        st = path.stat()
+        version = (st.st_mtime_ns, st.st_size)
+        data = self._get(path, version)
+        if data is None:
+            data = _load_json(path)
+            self._put(path, version, data)
+        return data
+
+    def load_record(self, path: Path, offset: int, length: int) -> Any:
+        """Return the parsed JSON record at offset in an append-only log"""
+        key = (path, offset)
+        data = self._get(key, length)
+        if data is None:
+            fd = os.open(path, os.O_RDONLY)
+            try:
+                raw = os.pread(fd, length, offset)
+            finally:
+                os.close(fd)
+            if len(raw) != length:
+                raise ValueError(f"Truncated record at {offset} in {path}")
+            data = _parse_json(raw)
+            self._put(key, length, data)
+        return data
+
+    def _get(self, key: Any, version: Any) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                return entry[1]
+        return None
+
+    def _put(self, key: Any, version: Any, data: Any):
+        with self._lock:
+            self._entries[key] = (version, data)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, path: Path):
+        with self._lock:
+            self._entries.pop(path, None)
+
+    def invalidate_dir(self, directory: Path):
+        with self._lock:
+            for key in list(self._entries):
+                path = key[0] if isinstance(key, tuple) else key
+                if path.parent == directory:
+                    del self._entries[key]
+
+
+class _BackgroundWriter:
+    """
+    Writes files on a background thread
+    后台写文件线程
+
+    Writes queued for the same path coalesce - only the latest bytes are
+    written - and each write replaces the file atomically. Queued data counts
+    as pending until it is on disk, so readers can see it via pending().
+    """
+
+    def __init__(self):
+        self._pending: Dict[Path, bytes] = {}
+        self._writing: Optional[Path] = None
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def write(self, path: Path, data: bytes):
+        with self._cond:
+            self._pending[path] = data
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="checkpoint-writer", daemon=True
+                )
+                self._thread.start()
+            self._cond.notify_all()
+
+    def pending(self, path: Path) -> Optional[bytes]:
+        """Bytes queued for path that aren't on disk yet, if any"""
+        with self._cond:
+            return self._pending.get(path)
+
+    def discard_dir(self, directory: Path):
+        """Drop queued writes into directory and wait out one in progress"""
+        with self._cond:
+            for path in [p for p in self._pending if p.parent == directory]:
+                del self._pending[path]
+            while self._writing is not None and self._writing.parent == directory:
+                self._cond.wait()
+
+    def flush(self):
+        """Block until everything queued so far is on disk"""
+        with self._cond:
+            while self._pending:
+                self._cond.wait()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                batch = list(self._pending.items())
+
+            for path, data in batch:
+                with self._cond:
+                    if self._pending.get(path) is not data:
+                        continue  # Superseded or discarded meanwhile
+                    self._writing = path
+                try:
+                    _write_file_atomic(path, data)
+                except OSError as e:
+                    logger.error(f"Failed to write {path}: {e}")
+                with self._cond:
+                    self._writing = None
+                    if self._pending.get(path) is data:
+                        del self._pending[path]
+                    self._cond.notify_all()
+
+
+@lru_cache(maxsize=4096)
+def _isoformat(timestamp: float) -> str:
+    """ISO string for a timestamp; summaries format the same timestamps on every request"""
+    return datetime.fromtimestamp(timestamp).isoformat()
+
+
 # Windows illegal filename characters: < > : " / \ | ? *
 ILLEGAL_FILENAME_CHARS = re.compile(r'[<>:"/\\|?*]')
 
@@ -45,11 +284,43 @@ def sanitize_filename(name: str) -> str:
     sanitized = sanitized.strip('-')
     return sanitized
 
-# Default data directory
-DATA_DIR = Path(__file__).parent.parent / "data" / "checkpoints"
 
+# Project/checkpoint IDs become path components: no separators, reserved or
+# control characters, and no leading dot (rules out "." / ".." and hidden files)
+_ID_RE = re.compile(r'\A(?!\.)[^<>:"/\\|?*\x00-\x1f]{1,128}\Z')
+
+
+def is_valid_id(value: str) -> bool:
+    """Check that a project/checkpoint ID is safe to use as a file name"""
+    return bool(_ID_RE.match(value))
 
-@dataclass
+# Default data directory
+DATA_DIR = Path(__file__).parent.parent / "data" / "checkpoints"
+# Thumbnail images, served at /thumbnails/ (project.thumbnail holds the URL path)
+THUMBNAILS_DIR = DATA_DIR.parent / "thumbnails"
+THUMBNAILS_URL_PREFIX = "/thumbnails/"
+
+# File contents are stored once per project in a content-addressed blob store
+# (blobs/<sha256[:2]>/<sha256>, zlib-compressed); checkpoint JSON only holds
+# {path: sha256} refs, so unchanged files aren't rewritten for every checkpoint
+BLOBS_DIR = "blobs"
+# Checkpoints of a project are appended to a single log file rather than one
+# JSON file each; the log index maps checkpoint ID -> [offset, length]
+LOG_INDEX_FILE = "checkpoints.idx"
+LOG_FILE = "checkpoints.log"
+LOG_COMPACT_RATIO = 0.5  # Rewrite the log once less than half of it is live
+_RECORD_HEADER = struct.Struct("<I")  # Length prefix, so the log can be scanned without the index
+# Copy of every project's manifest in one file, so listing projects is a
+# single read instead of one manifest parse per project directory
+INDEX_FILE = "_index.json"
+BLOB_COMPRESS_LEVEL = 3  # zlib: fast, and source code compresses well anyway
+# A conversation that extends the previous checkpoint's is stored as just the
+# new messages plus a reference to that checkpoint; every this many links the
+# full conversation is stored again, bounding how far a read has to walk
+CONVERSATION_CHAIN_MAX = 16
+
+
+@dataclass(slots=True)
 class Checkpoint:
     """
     Single checkpoint data structure
@@ -61,11 +332,15 @@ class Checkpoint:
     conversation: List[Dict[str, Any]]  # 对话记录
     files: Dict[str, str]               # 文件快照 {path: content}
     metadata: Dict[str, Any] = field(default_factory=dict)
+    # Recorded at save time so summaries don't need the file contents;
+    # None for checkpoints saved before these were stored
+    files_count: Optional[int] = None
+    total_size: Optional[int] = None
 
     @property
     def created_at(self) -> str:
         """Get ISO format creation time"""
-        return datetime.fromtimestamp(self.timestamp).isoformat()
+        return _isoformat(self.timestamp)
 
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dict for JSON serialization"""
@@ -77,12 +352,17 @@ class Checkpoint:
             "conversation": self.conversation,
             "files": self.files,
             "metadata": self.metadata,
+            "files_count": self.files_count,
+            "total_size": self.total_size,
         }
 
     def to_summary(self) -> Dict[str, Any]:
         """Convert to summary (without full data)"""
         # Calculate total size of all files
-        total_size = sum(len(content.encode('utf-8')) for content in self.files.values())
+        total_size = self.total_size
+        if total_size is None:
+            total_size = sum(len(content.encode('utf-8')) for content in self.files.values())
+        files_count = self.files_count if self.files_count is not None else len(self.files)
 
         return {
             "id": self.id,
@@ -90,7 +370,7 @@ class Checkpoint:
             "timestamp": self.timestamp,
             "created_at": self.created_at,
             "conversation_count": len(self.conversation),
-            "files_count": len(self.files),
+            "files_count": files_count,
             "total_size": total_size,  # Total size in bytes
             "metadata": self.metadata,
         }
@@ -102,13 +382,15 @@ class Checkpoint:
             id=data["id"],
             name=data["name"],
             timestamp=data["timestamp"],
-            conversation=data.get("conversation", []),
-            files=data.get("files", {}),
-            metadata=data.get("metadata", {}),
+            conversation=list(data.get("conversation", [])),
+            files=dict(data.get("files", {})),
+            metadata=dict(data.get("metadata", {})),
+            files_count=data.get("files_count"),
+            total_size=data.get("total_size"),
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class CheckpointProject:
     """
     Project containing multiple checkpoints
@@ -125,6 +407,11 @@ class CheckpointProject:
     updated_at: float
     checkpoints: List[str]              # checkpoint IDs
     current_checkpoint: Optional[str]   # 当前 checkpoint ID
+    # to_summary() results by project ID, tagged with the updated_at they were
+    # built for; the store shares one dict across the instances it hands out
+    _summaries: Dict[str, Tuple[float, Dict[str, Any]]] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
 
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dict for JSON serialization"""
@@ -143,18 +430,28 @@ class CheckpointProject:
         }
 
     def to_summary(self) -> Dict[str, Any]:
-        """Convert to summary for list endpoint"""
-        return {
+        """
+        Convert to summary for list endpoint
+
+        Memoized per updated_at, which every change made through the store bumps.
+        """
+        cached = self._summaries.get(self.id)
+        if cached is not None and cached[0] == self.updated_at:
+            return cached[1]
+
+        summary = {
             "id": self.id,
             "name": self.name,
             "description": self.description,
             "source_url": self.source_url,
             "thumbnail": self.thumbnail,
             "is_showcase": self.is_showcase,
-            "created_at": datetime.fromtimestamp(self.created_at).isoformat(),
-            "updated_at": datetime.fromtimestamp(self.updated_at).isoformat(),
+            "created_at": _isoformat(self.created_at),
+            "updated_at": _isoformat(self.updated_at),
             "checkpoint_count": len(self.checkpoints),
         }
+        self._summaries[self.id] = (self.updated_at, summary)
+        return summary
 
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> "CheckpointProject":
@@ -169,7 +466,7 @@ class CheckpointProject:
             is_showcase=data.get("is_showcase", False),
             created_at=data.get("created_at", time.time()),
             updated_at=data.get("updated_at", time.time()),
-            checkpoints=data.get("checkpoints", []),
+            checkpoints=list(data.get("checkpoints", [])),
             current_checkpoint=data.get("current_checkpoint"),
         )
 
@@ -181,12 +478,17 @@ class CheckpointStore:
 
     Directory structure:
     /data/checkpoints/
+    ├── _index.json          (all manifests, derived - safe to delete)
     ├── project-id-1/
     │   ├── manifest.json
-    │   ├── cp_001.json
-    │   └── cp_002.json
+    │   ├── checkpoints.log  (checkpoint records, append-only)
+    │   ├── checkpoints.idx  (checkpoint ID -> record location)
+    │   └── blobs/           (file contents by sha256)
     └── project-id-2/
         └── ...
+
+    Older projects may have cp_XXX.json files instead of the log; they are
+    still read.
     """
 
     def __init__(self, data_dir: Optional[Path] = None):
@@ -198,6 +500,21 @@ class CheckpointStore:
         """
         self.data_dir = Path(data_dir) if data_dir else DATA_DIR
         self.data_dir.mkdir(parents=True, exist_ok=True)
+        self._cache = _JsonFileCache()
+        self._index_path = self.data_dir / INDEX_FILE
+        self._index: Optional[Dict[str, Dict[str, Any]]] = None  # Loaded lazily
+        self._source_index: Dict[str, str] = {}  # source_id -> newest project ID, derived from _index
+        self._summaries: Dict[str, Tuple[float, Dict[str, Any]]] = {}  # Shared by CheckpointProject.to_summary
+        self._index_lock = threading.RLock()
+        # Manifests and the index are rewritten on every change; write them off
+        # the request path, keeping only the latest version of each
+        self._writer = _BackgroundWriter()
+        atexit.register(self._writer.flush)
+        self._log_lock = threading.Lock()
+        # Held over each read-modify-write of a project (manifest, log, blobs),
+        # so concurrent saves/deletes can't overwrite each other's manifest
+        self._project_locks: Dict[str, threading.Lock] = {}
+        self._project_locks_guard = threading.Lock()
         logger.info(f"Checkpoint store initialized at: {self.data_dir}")
 
     # ============================================
@@ -233,9 +550,11 @@ class CheckpointStore:
         # Generate ID
         if project_id:
             pid = sanitize_filename(project_id)
+            if not is_valid_id(pid):
+                raise ValueError(f"Invalid project ID: {project_id!r}")
         else:
             # Create slug from name (sanitize for Windows compatibility)
-            slug = sanitize_filename(name.lower().replace(" ", "-"))[:30]
+            slug = sanitize_filename(name.lower().replace(" ", "-"))[:30].lstrip(".")
             pid = f"{slug}-{str(uuid.uuid4())[:8]}"
 
         now = time.time()
@@ -252,6 +571,7 @@ class CheckpointStore:
             checkpoints=[],
             current_checkpoint=None,
         )
+        project._summaries = self._summaries
 
         # Create project directory
         project_dir = self.data_dir / pid
@@ -268,14 +588,16 @@ class CheckpointStore:
         Get project by ID
         根据 ID 获取项目
         """
-        manifest_path = self.data_dir / project_id / "manifest.json"
-        if not manifest_path.exists():
+        if not is_valid_id(project_id):
             return None
-
+        manifest_path = self.data_dir / project_id / "manifest.json"
         try:
-            with open(manifest_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            return CheckpointProject.from_dict(data)
+            pending = self._writer.pending(manifest_path)
+            if pending is not None:
+                return self._project_from_dict(_parse_json(pending))
+            return self._project_from_dict(self._cache.load(manifest_path))
+        except FileNotFoundError:
+            return None
         except Exception as e:
             logger.error(f"Failed to load project {project_id}: {e}")
             return None
@@ -291,13 +613,14 @@ class CheckpointStore:
         Returns:
             List of projects, sorted by updated_at (newest first)
         """
+        with self._index_lock:
+            entries = list(self._get_index().values())
+
         projects = []
-        for item in self.data_dir.iterdir():
-            if item.is_dir():
-                project = self.get_project(item.name)
-                if project:
-                    if include_temp or project.is_showcase:
-                        projects.append(project)
+        for data in entries:
+            project = self._project_from_dict(data)
+            if include_temp or project.is_showcase:
+                projects.append(project)
 
         return sorted(projects, key=lambda p: -p.updated_at)
 
@@ -313,21 +636,22 @@ class CheckpointStore:
         Update project metadata
         更新项目元数据
         """
-        project = self.get_project(project_id)
-        if not project:
-            return None
-
-        if name is not None:
-            project.name = name
-        if description is not None:
-            project.description = description
-        if thumbnail is not None:
-            project.thumbnail = thumbnail
-        if is_showcase is not None:
-            project.is_showcase = is_showcase
-
-        project.updated_at = time.time()
-        self._save_manifest(project)
+        with self._project_lock(project_id):
+            project = self.get_project(project_id)
+            if not project:
+                return None
+
+            if name is not None:
+                project.name = name
+            if description is not None:
+                project.description = description
+            if thumbnail is not None:
+                project.thumbnail = thumbnail
+            if is_showcase is not None:
+                project.is_showcase = is_showcase
+
+            project.updated_at = time.time()
+            self._save_manifest(project)
 
         return project
 
@@ -343,21 +667,31 @@ class CheckpointStore:
         Returns:
             True if deleted
         """
-        project = self.get_project(project_id)
-        if not project:
-            return False
-
-        # Protect showcase projects
-        if project.is_showcase and not force:
-            logger.warning(f"Cannot delete showcase project: {project_id}")
-            return False
-
-        # Delete directory
-        project_dir = self.data_dir / project_id
-        if project_dir.exists():
-            shutil.rmtree(project_dir)
-            logger.info(f"Deleted project: {project_id}")
-            return True
+        with self._project_lock(project_id):
+            project = self.get_project(project_id)
+            if not project:
+                return False
+
+            # Protect showcase projects
+            if project.is_showcase and not force:
+                logger.warning(f"Cannot delete showcase project: {project_id}")
+                return False
+
+            # Delete directory
+            project_dir = self.data_dir / project_id
+            if project_dir.exists():
+                self._writer.discard_dir(project_dir)
+                shutil.rmtree(project_dir)
+                self._cache.invalidate_dir(project_dir)
+                self._summaries.pop(project_id, None)
+                with self._index_lock:
+                    index = self._get_index()
+                    if index.pop(project_id, None) is not None:
+                        self._write_index(index)
+                        if self._source_index.get(project.source_id) == project_id:
+                            self._rebuild_source_index(index)
+                logger.info(f"Deleted project: {project_id}")
+                return True
 
         return False
 
@@ -403,34 +737,51 @@ class CheckpointStore:
         Returns:
             Created Checkpoint, or None if project not found
         """
-        project = self.get_project(project_id)
-        if not project:
-            logger.error(f"Project not found: {project_id}")
-            return None
-
-        # Generate checkpoint ID
-        cp_num = len(project.checkpoints) + 1
-        cp_id = f"cp_{cp_num:03d}"
-
-        checkpoint = Checkpoint(
-            id=cp_id,
-            name=name,
-            timestamp=time.time(),
-            conversation=conversation,
-            files=files,
-            metadata=metadata or {},
-        )
-
-        # Save checkpoint file
-        cp_path = self.data_dir / project_id / f"{cp_id}.json"
-        with open(cp_path, "w", encoding="utf-8") as f:
-            json.dump(checkpoint.to_dict(), f, ensure_ascii=False, indent=2)
+        with self._project_lock(project_id):
+            project = self.get_project(project_id)
+            if not project:
+                logger.error(f"Project not found: {project_id}")
+                return None
+
+            # Generate checkpoint ID (after the highest one, so IDs freed by
+            # deleting a checkpoint are never reused)
+            cp_num = max(
+                (int(cp[3:]) for cp in project.checkpoints if cp[3:].isdigit()),
+                default=0,
+            ) + 1
+            cp_id = f"cp_{cp_num:03d}"
+
+            checkpoint = Checkpoint(
+                id=cp_id,
+                name=name,
+                timestamp=time.time(),
+                conversation=conversation,
+                files=files,
+                metadata=metadata or {},
+            )
 
-        # Update project
-        project.checkpoints.append(cp_id)
-        project.current_checkpoint = cp_id
-        project.updated_at = time.time()
-        self._save_manifest(project)
+            # Save checkpoint file (file contents go to the blob store, the JSON keeps refs)
+            project_dir = self.data_dir / project_id
+            file_refs = {}
+            total_size = 0
+            for path, content in files.items():
+                file_refs[path], size = self._store_blob(project_dir, content)
+                total_size += size
+            checkpoint.files_count = len(files)
+            checkpoint.total_size = total_size
+
+            data = checkpoint.to_dict()
+            del data["files"]
+            data["file_refs"] = file_refs
+            if project.checkpoints:
+                self._delta_encode_conversation(project_dir, project.checkpoints[-1], data)
+            self._append_checkpoint(project_dir, cp_id, data)
+
+            # Update project
+            project.checkpoints.append(cp_id)
+            project.current_checkpoint = cp_id
+            project.updated_at = time.time()
+            self._save_manifest(project)
 
         logger.info(f"Saved checkpoint {cp_id} to project {project_id}")
         return checkpoint
@@ -439,19 +790,30 @@ class CheckpointStore:
         self,
         project_id: str,
         checkpoint_id: str,
+        include_files: bool = True,
     ) -> Optional[Checkpoint]:
         """
         Get checkpoint by ID
         根据 ID 获取检查点
+
+        Args:
+            include_files: Also load the file snapshots (the bulk of the data);
+                when False, files is left empty
         """
-        cp_path = self.data_dir / project_id / f"{checkpoint_id}.json"
-        if not cp_path.exists():
+        if not (is_valid_id(project_id) and is_valid_id(checkpoint_id)):
             return None
-
         try:
-            with open(cp_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
+            project_dir = self.data_dir / project_id
+            data = self._load_checkpoint_data(project_dir, checkpoint_id)
+            if "conversation_base" in data:
+                data = {**data, "conversation": self._load_conversation(project_dir, data)}
+            # Older checkpoints embed files in the JSON itself
+            file_refs = data.get("file_refs")
+            if file_refs is not None and include_files:
+                data = {**data, "files": self._load_blobs(self.data_dir / project_id, file_refs)}
             return Checkpoint.from_dict(data)
+        except FileNotFoundError:
+            return None
         except Exception as e:
             logger.error(f"Failed to load checkpoint {checkpoint_id}: {e}")
             return None
@@ -481,7 +843,20 @@ class CheckpointStore:
         Get checkpoint summaries (without full data)
         获取检查点摘要（不含完整数据）
         """
-        checkpoints = self.list_checkpoints(project_id)
+        project = self.get_project(project_id)
+        if not project:
+            return []
+
+        checkpoints = []
+        for cp_id in project.checkpoints:
+            cp = self.get_checkpoint(project_id, cp_id, include_files=False)
+            if cp and cp.total_size is None and not cp.files:
+                # Saved before sizes were recorded - need the files to compute them
+                cp = self.get_checkpoint(project_id, cp_id)
+            if cp:
+                checkpoints.append(cp)
+
+        checkpoints.sort(key=lambda c: c.timestamp)
         return [cp.to_summary() for cp in checkpoints]
 
     def delete_checkpoint(
@@ -493,36 +868,324 @@ class CheckpointStore:
         Delete a checkpoint
         删除检查点
         """
-        project = self.get_project(project_id)
-        if not project or checkpoint_id not in project.checkpoints:
-            return False
-
-        # Delete file
-        cp_path = self.data_dir / project_id / f"{checkpoint_id}.json"
-        if cp_path.exists():
-            cp_path.unlink()
-
-        # Update project
-        project.checkpoints.remove(checkpoint_id)
-        if project.current_checkpoint == checkpoint_id:
-            project.current_checkpoint = (
-                project.checkpoints[-1] if project.checkpoints else None
-            )
-        project.updated_at = time.time()
-        self._save_manifest(project)
+        with self._project_lock(project_id):
+            project = self.get_project(project_id)
+            if not project or checkpoint_id not in project.checkpoints:
+                return False
+
+            # Delete record
+            project_dir = self.data_dir / project_id
+            removed_refs = set()
+            try:
+                removed_refs = set(
+                    self._load_checkpoint_data(project_dir, checkpoint_id).get("file_refs", {}).values()
+                )
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                logger.warning(f"Could not read blob refs of {checkpoint_id}: {e}")
+            if not self._rebase_conversations(project_dir, project, checkpoint_id):
+                return False
+            self._remove_checkpoint(project_dir, checkpoint_id)
+
+            # Update project
+            project.checkpoints.remove(checkpoint_id)
+            if project.current_checkpoint == checkpoint_id:
+                project.current_checkpoint = (
+                    project.checkpoints[-1] if project.checkpoints else None
+                )
+            project.updated_at = time.time()
+            self._save_manifest(project)
+
+            if removed_refs:
+                self._prune_blobs(project, removed_refs)
 
         logger.info(f"Deleted checkpoint {checkpoint_id} from project {project_id}")
         return True
 
+    def flush(self):
+        """
+        Wait for queued manifest/index writes to reach disk
+        等待排队的写入落盘
+        """
+        self._writer.flush()
+
     # ============================================
     # Helper Methods
     # ============================================
 
+    def _project_lock(self, project_id: str) -> threading.Lock:
+        """Lock serializing changes to one project"""
+        with self._project_locks_guard:
+            lock = self._project_locks.get(project_id)
+            if lock is None:
+                lock = self._project_locks[project_id] = threading.Lock()
+            return lock
+
+    def _project_from_dict(self, data: Dict[str, Any]) -> CheckpointProject:
+        """Build a project that shares the store's summary cache"""
+        project = CheckpointProject.from_dict(data)
+        project._summaries = self._summaries
+        return project
+
+    def _load_log_index(self, project_dir: Path) -> Dict[str, Any]:
+        """Load the checkpoint log index (shared with the cache - don't mutate)"""
+        try:
+            return self._cache.load(project_dir / LOG_INDEX_FILE)
+        except FileNotFoundError:
+            return {"log": LOG_FILE, "records": {}}
+
+    def _write_log_index(self, project_dir: Path, log_index: Dict[str, Any]):
+        """Replace the checkpoint log index atomically"""
+        index_path = project_dir / LOG_INDEX_FILE
+        _write_file_atomic(index_path, dump_json(log_index))
+        self._cache.invalidate(index_path)
+
+    def _load_checkpoint_data(self, project_dir: Path, checkpoint_id: str) -> Dict[str, Any]:
+        """
+        Load a checkpoint's raw dict from the log, or from its own JSON file
+        for older checkpoints; raises FileNotFoundError if there is neither
+        """
+        log_index = self._load_log_index(project_dir)
+        location = log_index["records"].get(checkpoint_id)
+        if location is None:
+            return self._cache.load(project_dir / f"{checkpoint_id}.json")
+        offset, length = location
+        return self._cache.load_record(project_dir / log_index["log"], offset, length)
+
+    def _load_conversation(self, project_dir: Path, data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Rebuild a checkpoint's full conversation by walking its base chain"""
+        tails = []
+        while "conversation_base" in data:
+            tails.append(data["conversation_tail"])
+            data = self._load_checkpoint_data(project_dir, data["conversation_base"])
+        conversation = list(data.get("conversation", []))
+        for tail in reversed(tails):
+            conversation.extend(tail)
+        return conversation
+
+    def _delta_encode_conversation(self, project_dir: Path, base_id: str, data: Dict[str, Any]):
+        """
+        Replace data["conversation"] with only the messages added since
+        checkpoint base_id, if it extends that checkpoint's conversation
+        """
+        try:
+            base = self._load_checkpoint_data(project_dir, base_id)
+            base_conversation = self._load_conversation(project_dir, base)
+        except Exception as e:
+            logger.warning(f"Storing full conversation, could not read {base_id}: {e}")
+            return
+
+        depth = base.get("conversation_depth", 0) + 1
+        conversation = data["conversation"]
+        prefix_len = len(base_conversation)
+        if (
+            depth > CONVERSATION_CHAIN_MAX
+            or len(conversation) < prefix_len
+            or conversation[:prefix_len] != base_conversation
+        ):
+            return
+
+        del data["conversation"]
+        data["conversation_base"] = base_id
+        data["conversation_tail"] = conversation[prefix_len:]
+        data["conversation_depth"] = depth
+
+    def _rebase_conversations(self, project_dir: Path, project: CheckpointProject, base_id: str) -> bool:
+        """
+        Store the full conversation in checkpoints that build on base_id, so
+        it can be removed; False if any of them couldn't be rewritten
+        """
+        for cp_id in project.checkpoints:
+            if cp_id == base_id:
+                continue
+            try:
+                data = self._load_checkpoint_data(project_dir, cp_id)
+                if data.get("conversation_base") != base_id:
+                    continue
+                flat = {
+                    key: value for key, value in data.items()
+                    if key not in ("conversation_base", "conversation_tail", "conversation_depth")
+                }
+                flat["conversation"] = self._load_conversation(project_dir, data)
+                self._append_checkpoint(project_dir, cp_id, flat)
+            except Exception as e:
+                logger.error(f"Failed to rebase conversation of {cp_id}: {e}")
+                return False
+        return True
+
+    def _append_checkpoint(self, project_dir: Path, checkpoint_id: str, data: Dict[str, Any]):
+        """Append a checkpoint record to the project's log and index it"""
+        with self._log_lock:
+            log_index = self._load_log_index(project_dir)
+            log_path = project_dir / log_index["log"]
+            with open(os.open(log_path, os.O_RDWR | os.O_CREAT, 0o644), "r+b") as f:
+                start = f.seek(0, os.SEEK_END)
+                f.write(_RECORD_HEADER.pack(0))
+                _write_json_streamed(f, data)
+                length = f.tell() - start - _RECORD_HEADER.size
+                # Fill in the length prefix now that the record is written
+                f.seek(start)
+                f.write(_RECORD_HEADER.pack(length))
+                f.flush()
+                os.fsync(f.fileno())
+
+            records = dict(log_index["records"])
+            records[checkpoint_id] = [start + _RECORD_HEADER.size, length]
+            self._write_log_index(project_dir, {"log": log_index["log"], "records": records})
+
+    def _remove_checkpoint(self, project_dir: Path, checkpoint_id: str):
+        """Drop a checkpoint from the log index (or delete its legacy file)"""
+        with self._log_lock:
+            log_index = self._load_log_index(project_dir)
+            if checkpoint_id not in log_index["records"]:
+                cp_path = project_dir / f"{checkpoint_id}.json"
+                if cp_path.exists():
+                    cp_path.unlink()
+                    self._cache.invalidate(cp_path)
+                return
+
+            # The record stays in the log as dead space until compaction
+            records = dict(log_index["records"])
+            del records[checkpoint_id]
+            log_index = {"log": log_index["log"], "records": records}
+
+            log_path = project_dir / log_index["log"]
+            live = sum(length + _RECORD_HEADER.size for _, length in records.values())
+            compact = live < log_path.stat().st_size * LOG_COMPACT_RATIO
+            if compact:
+                log_index = self._compact_log(project_dir, log_index)
+            self._write_log_index(project_dir, log_index)
+            if compact:
+                log_path.unlink()
+                self._cache.invalidate_dir(project_dir)
+
+    def _compact_log(self, project_dir: Path, log_index: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Copy the live records into a fresh log file and return the index for it
+
+        The new log gets a new name, so the index (replaced atomically by the
+        caller) always points at a complete log; the caller removes the old one.
+        """
+        old_path = project_dir / log_index["log"]
+        new_name = f"checkpoints.{uuid.uuid4().hex[:8]}.log"
+        records = {}
+        with open(old_path, "rb") as src, open(project_dir / new_name, "wb") as dst:
+            for cp_id, (offset, length) in sorted(log_index["records"].items(), key=lambda r: r[1][0]):
+                src.seek(offset)
+                records[cp_id] = [dst.tell() + _RECORD_HEADER.size, length]
+                dst.write(_RECORD_HEADER.pack(length))
+                dst.write(src.read(length))
+            dst.flush()
+            os.fsync(dst.fileno())
+
+        return {"log": new_name, "records": records}
+
+    def _store_blob(self, project_dir: Path, content: str) -> Tuple[str, int]:
+        """Store file content in the project's blob store, returning (sha256, size in bytes)"""
+        raw = content.encode("utf-8")
+        digest = hashlib.sha256(raw).hexdigest()
+        blob_path = project_dir / BLOBS_DIR / digest[:2] / digest
+        if not blob_path.exists():
+            blob_path.parent.mkdir(parents=True, exist_ok=True)
+            # Atomic: a truncated blob would never be rewritten, since
+            # existing blobs are skipped
+            _write_file_atomic(blob_path, zlib.compress(raw, BLOB_COMPRESS_LEVEL))
+        return digest, len(raw)
+
+    def _load_blobs(self, project_dir: Path, file_refs: Dict[str, str]) -> Dict[str, str]:
+        """Resolve {path: sha256} refs to {path: content}"""
+        contents: Dict[str, str] = {}  # Identical files share one blob read
+        files = {}
+        for path, digest in file_refs.items():
+            content = contents.get(digest)
+            if content is None:
+                blob_path = project_dir / BLOBS_DIR / digest[:2] / digest
+                content = contents[digest] = zlib.decompress(blob_path.read_bytes()).decode("utf-8")
+            files[path] = content
+        return files
+
+    def _prune_blobs(self, project: CheckpointProject, candidates: set):
+        """Delete blobs from candidates that no remaining checkpoint references"""
+        project_dir = self.data_dir / project.id
+        in_use = set()
+        for cp_id in project.checkpoints:
+            try:
+                in_use.update(self._load_checkpoint_data(project_dir, cp_id).get("file_refs", {}).values())
+            except Exception as e:
+                # Unreadable checkpoint: keep every blob rather than risk losing its files
+                logger.warning(f"Skipping blob pruning, could not read {cp_id}: {e}")
+                return
+        for digest in candidates - in_use:
+            blob_path = project_dir / BLOBS_DIR / digest[:2] / digest
+            if blob_path.exists():
+                blob_path.unlink()
+
     def _save_manifest(self, project: CheckpointProject):
         """Save project manifest to file"""
         manifest_path = self.data_dir / project.id / "manifest.json"
-        with open(manifest_path, "w", encoding="utf-8") as f:
-            json.dump(project.to_dict(), f, ensure_ascii=False, indent=2)
+        data = project.to_dict()
+        self._writer.write(manifest_path, dump_json(data))
+        self._cache.invalidate(manifest_path)
+        with self._index_lock:
+            index = self._get_index()
+            index[project.id] = data
+            self._write_index(index)
+            if project.source_id:
+                # Just saved, so this is now the most recently updated project for the source
+                self._source_index[project.source_id] = project.id
+
+    def _get_index(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get the project index {project_id: manifest}, reconciled with the
+        project directories on disk (picks up copied-in projects, drops
+        removed ones)
+        """
+        with self._index_lock:
+            loaded = self._index is None
+            if loaded:
+                try:
+                    self._index = _load_json(self._index_path)
+                except FileNotFoundError:
+                    self._index = {}
+                except Exception as e:
+                    logger.warning(f"Rebuilding unreadable checkpoint index: {e}")
+                    self._index = {}
+            index = self._index
+
+            # DirEntry.is_dir() answers from readdir's d_type - no stat per entry
+            with os.scandir(self.data_dir) as entries:
+                project_ids = {entry.name for entry in entries if entry.is_dir(follow_symlinks=False)}
+            changed = False
+            for pid in project_ids - index.keys():
+                project = self.get_project(pid)
+                if project:
+                    index[pid] = project.to_dict()
+                    changed = True
+            for pid in index.keys() - project_ids:
+                del index[pid]
+                changed = True
+            if changed:
+                self._write_index(index)
+            if loaded or changed:
+                self._rebuild_source_index(index)
+            return index
+
+    def _rebuild_source_index(self, index: Dict[str, Dict[str, Any]]):
+        """Map each source_id to its most recently updated project (list_projects order)"""
+        source_index: Dict[str, str] = {}
+        newest: Dict[str, float] = {}
+        for pid, data in index.items():
+            source_id = data.get("source_id")
+            updated_at = data.get("updated_at", 0)
+            if source_id and updated_at >= newest.get(source_id, float("-inf")):
+                source_index[source_id] = pid
+                newest[source_id] = updated_at
+        self._source_index = source_index
+
+    def _write_index(self, index: Dict[str, Dict[str, Any]]):
+        """Save the project index to file"""
+        self._writer.write(self._index_path, dump_json(index))
 
     def get_or_create_project(
         self,
@@ -539,9 +1202,12 @@ class CheckpointStore:
         """
         # Try to find by source_id first
         if source_id:
-            for project in self.list_projects():
-                if project.source_id == source_id:
-                    return project
+            with self._index_lock:
+                self._get_index()
+                project_id = self._source_index.get(source_id)
+            project = self.get_project(project_id) if project_id else None
+            if project:
+                return project
 
         # Create new project
         return self.create_project(
@@ -15,13 +15,18 @@ Provides HTTP endpoints for checkpoint operations:
 - DELETE /api/checkpoints/projects/{id}/{cp_id} - Delete checkpoint
 
 - POST   /api/checkpoints/clear-temp            - Clear temporary projects
+
+Thumbnail images are served separately at /thumbnails/* (mounted in main.py).
 """
 
+import asyncio
+
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import Response
 from pydantic import BaseModel, Field
 from typing import Dict, Any, Optional, List
 
-from .checkpoint_store import checkpoint_store
+from .checkpoint_store import checkpoint_store, is_valid_id, dump_json, THUMBNAILS_URL_PREFIX
 
 router = APIRouter(prefix="/api/checkpoints", tags=["checkpoints"])
 
@@ -36,7 +41,7 @@ class CreateProjectRequest(BaseModel):
     description: str = Field("", description="Project description")
     source_id: Optional[str] = Field(None, description="Associated source ID")
     source_url: Optional[str] = Field(None, description="Source URL")
-    thumbnail: Optional[str] = Field(None, description="Thumbnail path")
+    thumbnail: Optional[str] = Field(None, description="Thumbnail URL (/thumbnails/... or http(s))")
     is_showcase: bool = Field(False, description="Is showcase (permanent)")
     project_id: Optional[str] = Field(None, description="Custom project ID")
 
@@ -81,6 +86,51 @@ class CheckpointSummary(BaseModel):
     metadata: Dict[str, Any]
 
 
+def _json_response(payload: Dict[str, Any]) -> Response:
+    """
+    Encode a plain-JSON payload straight to bytes (orjson when available),
+    skipping FastAPI's jsonable_encoder copy of every nested dict/list
+    """
+    return Response(content=dump_json(payload), media_type="application/json")
+
+
+def _validate_ids(*ids: str):
+    """Reject IDs that aren't safe path components before touching the filesystem"""
+    for value in ids:
+        if not is_valid_id(value):
+            raise HTTPException(status_code=400, detail=f"Invalid ID: {value!r}")
+
+
+# Longer values can only be inline image data, not a URL to the image
+THUMBNAIL_MAX_LENGTH = 2048
+
+
+def _validate_thumbnail(thumbnail: Optional[str]):
+    """
+    Thumbnails are stored as a URL to the image, never the image itself:
+    inline data URLs would bloat every project listing
+    """
+    if thumbnail is None:
+        return
+    if len(thumbnail) > THUMBNAIL_MAX_LENGTH:
+        raise HTTPException(
+            status_code=400,
+            detail=f"thumbnail must be a URL of at most {THUMBNAIL_MAX_LENGTH} characters",
+        )
+    if thumbnail.startswith(("http://", "https://")):
+        return
+    name = thumbnail[len(THUMBNAILS_URL_PREFIX):]
+    if (
+        not thumbnail.startswith(THUMBNAILS_URL_PREFIX)
+        or "\\" in name
+        or any(part in ("", ".", "..") for part in name.split("/"))
+    ):
+        raise HTTPException(
+            status_code=400,
+            detail=f"thumbnail must be an http(s) URL or a path under {THUMBNAILS_URL_PREFIX}, not inline image data",
+        )
+
+
 # ============================================
 # Project Endpoints
 # ============================================
@@ -94,6 +144,7 @@ async def create_project(request: CreateProjectRequest):
     If source_id is provided and a project with that source_id already exists,
     returns the existing project instead of creating a new one.
     """
+    _validate_thumbnail(request.thumbnail)
     try:
         # Use get_or_create to avoid duplicates when called multiple times
         project = checkpoint_store.get_or_create_project(
@@ -123,11 +174,11 @@ async def list_projects(include_temp: bool = True):
         include_temp: Include temporary (non-showcase) projects
     """
     projects = checkpoint_store.list_projects(include_temp=include_temp)
-    return {
+    return _json_response({
         "success": True,
         "count": len(projects),
         "projects": [p.to_summary() for p in projects],
-    }
+    })
 
 
 @router.get("/projects/{project_id}")
@@ -136,6 +187,7 @@ async def get_project(project_id: str):
     Get project detail with checkpoint list
     获取项目详情及检查点列表
     """
+    _validate_ids(project_id)
     project = checkpoint_store.get_project(project_id)
     if not project:
         raise HTTPException(status_code=404, detail=f"Project not found: {project_id}")
@@ -155,6 +207,8 @@ async def update_project(project_id: str, request: UpdateProjectRequest):
     Update project metadata
     更新项目元数据
     """
+    _validate_ids(project_id)
+    _validate_thumbnail(request.thumbnail)
     project = checkpoint_store.update_project(
         project_id=project_id,
         name=request.name,
@@ -181,6 +235,7 @@ async def delete_project(project_id: str, force: bool = False):
     Args:
         force: Force delete even if is_showcase
     """
+    _validate_ids(project_id)
     project = checkpoint_store.get_project(project_id)
     if not project:
         raise HTTPException(status_code=404, detail=f"Project not found: {project_id}")
@@ -191,7 +246,7 @@ async def delete_project(project_id: str, force: bool = False):
             detail="Cannot delete showcase project. Use force=true to override."
         )
 
-    if checkpoint_store.delete_project(project_id, force=force):
+    if await asyncio.to_thread(checkpoint_store.delete_project, project_id, force=force):
         return {
             "success": True,
             "message": f"Deleted project: {project_id}",
@@ -209,7 +264,9 @@ async def save_checkpoint(project_id: str, request: SaveCheckpointRequest):
     Save a new checkpoint to project
     保存新的检查点到项目
     """
-    checkpoint = checkpoint_store.save_checkpoint(
+    _validate_ids(project_id)
+    checkpoint = await asyncio.to_thread(
+        checkpoint_store.save_checkpoint,
         project_id=project_id,
         name=request.name,
         conversation=request.conversation,
@@ -232,17 +289,18 @@ async def list_checkpoints(project_id: str):
     List all checkpoints in project
     列出项目中的所有检查点
     """
+    _validate_ids(project_id)
     project = checkpoint_store.get_project(project_id)
     if not project:
         raise HTTPException(status_code=404, detail=f"Project not found: {project_id}")
 
     checkpoints = checkpoint_store.get_checkpoint_summaries(project_id)
-    return {
+    return _json_response({
         "success": True,
         "project_id": project_id,
         "count": len(checkpoints),
         "checkpoints": checkpoints,
-    }
+    })
 
 
 @router.get("/projects/{project_id}/{checkpoint_id}")
@@ -251,17 +309,19 @@ async def get_checkpoint(project_id: str, checkpoint_id: str):
     Get checkpoint detail with full data
     获取检查点详情（含完整数据）
     """
-    checkpoint = checkpoint_store.get_checkpoint(project_id, checkpoint_id)
+    _validate_ids(project_id, checkpoint_id)
+    checkpoint = await asyncio.to_thread(checkpoint_store.get_checkpoint, project_id, checkpoint_id)
     if not checkpoint:
         raise HTTPException(
             status_code=404,
             detail=f"Checkpoint not found: {project_id}/{checkpoint_id}"
         )
 
-    return {
+    # All files + conversation - large enough to encode off the event loop
+    return await asyncio.to_thread(_json_response, {
         "success": True,
         "checkpoint": checkpoint.to_dict(),
-    }
+    })
 
 
 @router.delete("/projects/{project_id}/{checkpoint_id}")
@@ -270,7 +330,8 @@ async def delete_checkpoint(project_id: str, checkpoint_id: str):
     Delete a checkpoint
     删除检查点
     """
-    if checkpoint_store.delete_checkpoint(project_id, checkpoint_id):
+    _validate_ids(project_id, checkpoint_id)
+    if await asyncio.to_thread(checkpoint_store.delete_checkpoint, project_id, checkpoint_id):
         return {
             "success": True,
             "message": f"Deleted checkpoint: {checkpoint_id}",
@@ -293,11 +354,16 @@ async def list_all_checkpoints():
 
     Returns checkpoints grouped by project, sorted by timestamp (newest first).
     """
-    projects = checkpoint_store.list_projects(include_temp=True)
+    projects = await asyncio.to_thread(checkpoint_store.list_projects, include_temp=True)
+    # Load each project's summaries in parallel worker threads (file reads
+    # and JSON parsing), off the event loop
+    summaries = await asyncio.gather(*(
+        asyncio.to_thread(checkpoint_store.get_checkpoint_summaries, project.id)
+        for project in projects
+    ))
     all_checkpoints = []
 
-    for project in projects:
-        checkpoints = checkpoint_store.get_checkpoint_summaries(project.id)
+    for project, checkpoints in zip(projects, summaries):
         for cp in checkpoints:
             all_checkpoints.append({
                 **cp,
@@ -309,12 +375,12 @@ async def list_all_checkpoints():
     # Sort by timestamp (newest first)
     all_checkpoints.sort(key=lambda x: x.get("timestamp", 0), reverse=True)
 
-    return {
+    return _json_response({
         "success": True,
         "count": len(all_checkpoints),
         "projects_count": len(projects),
         "checkpoints": all_checkpoints,
-    }
+    })
 
 
 @router.post("/clear-temp")
@@ -326,7 +392,7 @@ async def clear_temp_projects():
     This is called on page refresh to clean up user session data
     while preserving showcase projects.
     """
-    count = checkpoint_store.clear_temp_projects()
+    count = await asyncio.to_thread(checkpoint_store.clear_temp_projects)
     return {
         "success": True,
         "message": f"Cleared {count} temporary projects",
@@ -341,8 +407,8 @@ async def list_showcases():
     只列出展示案例（用于 Gallery）
     """
     projects = checkpoint_store.list_projects(include_temp=False)
-    return {
+    return _json_response({
         "success": True,
         "count": len(projects),
         "showcases": [p.to_summary() for p in projects],
-    }
+    })
@@ -1,41 +1,325 @@
 """
 Code Generation Configuration
 后端配置文件
+
+Settings are resolved lazily (PEP 562 module ``__getattr__``): each one is
+read from the environment and cast on first access, then cached.
+配置项在首次访问时才读取并缓存
 """
 
 import os
-from dotenv import load_dotenv
+import sys
+from dataclasses import dataclass
+from functools import lru_cache
+from types import MappingProxyType
+from urllib.parse import urlsplit
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple
+
+_BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+_ENV_FILE = os.path.join(_BACKEND_DIR, ".env")
+
+
+def _parse_env_file(path: str) -> Optional[Dict[str, str]]:
+    """
+    Parse plain KEY=VALUE lines (optionally quoted, with # comments).
+    Returns None when the file uses anything more (export prefixes, variable
+    expansion, escapes, multi-line values) so python-dotenv handles it instead.
+    解析简单的 .env 文件
+    """
+    values: Dict[str, str] = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            key, sep, value = line.partition("=")
+            key = key.strip()
+            if not sep:
+                continue
+            if not key or any(c.isspace() for c in key):
+                return None
+            value = value.strip()
+            if value[:1] in ("'", '"'):
+                quote = value[0]
+                end = value.find(quote, 1)
+                if end == -1:
+                    return None
+                rest = value[end + 1:].strip()
+                value = value[1:end]
+                if rest and not rest.startswith("#"):
+                    return None
+                if quote == '"' and ("$" in value or "\\" in value):
+                    return None
+            else:
+                value = value.split(" #", 1)[0].rstrip()
+                if "$" in value or "\\" in value:
+                    return None
+            values[key] = value
+    return values
+
+
+def _load_env_file() -> None:
+    """
+    Load backend/.env into os.environ without overriding variables already set.
+    Skipped when SKIP_DOTENV=1 or there is no .env (e.g. containers that inject
+    the environment). Prefers env_compiled.py (see scripts/compile_env.py)
+    while it matches .env, then the built-in parser; python-dotenv is only
+    imported for files the built-in parser does not handle.
+    加载 .env（无 .env 或 SKIP_DOTENV=1 时跳过）
+    """
+    if os.environ.get("SKIP_DOTENV") == "1":
+        return
+    try:
+        mtime_ns = os.stat(_ENV_FILE).st_mtime_ns
+    except OSError:
+        return
+    try:
+        from env_compiled import ENV, SOURCE_MTIME_NS
+    except ImportError:
+        SOURCE_MTIME_NS = None
+    if SOURCE_MTIME_NS != mtime_ns:
+        try:
+            ENV = _parse_env_file(_ENV_FILE)
+        except (OSError, UnicodeDecodeError):
+            ENV = None
+    if ENV is not None:
+        for key, value in ENV.items():
+            os.environ.setdefault(key, value)
+        return
+    from dotenv import load_dotenv
+    load_dotenv(_ENV_FILE)
+
 
 # Load environment variables from .env file
-load_dotenv()
+_load_env_file()
+
+# Snapshot of the environment, taken once after .env is loaded; every setting
+# below is resolved from this plain dict rather than through os.environ
+_ENV = os.environ.copy()
+
+
+# Accepted spellings of a true flag, matched without lowercasing
+_TRUE = frozenset({"true", "True", "TRUE", "1", "yes", "on"})
+
+
+
+@lru_cache(maxsize=None)
+def _env_str(key: str, default: Optional[str] = None) -> Optional[str]:
+    """Read one variable from the environment snapshot (memoized)"""
+    return _ENV.get(key, default)
+
+
+@lru_cache(maxsize=None)
+def _env_int(key: str, default: str) -> int:
+    """Read and parse one positive integer variable (memoized)"""
+    raw = _env_str(key, default)
+    try:
+        return _to_pos_int(raw)
+    except ValueError as e:
+        raise RuntimeError(f"{key} must be a positive integer, got {raw!r}") from e
+
+
+def _to_bool(value: str) -> bool:
+    return value in _TRUE
+
+
+# Short identifiers (URLs, model names, hosts) that end up as request fields
+# and dict keys; interned so comparisons can short-circuit on identity
+_intern = sys.intern
+
+
+# Memoized per raw string, so re-resolving after a refresh is a cache hit
+@lru_cache(maxsize=None)
+def _to_pos_int(value: str) -> int:
+    parsed = int(value)
+    if parsed <= 0:
+        raise ValueError(f"must be > 0, got {parsed}")
+    return parsed
+
+
+# Setting name -> (default, caster)
+_DEFAULTS: Dict[str, Tuple[str, Callable[[str], Any]]] = {
+    # ==================== Claude Proxy Configuration ====================
+    # 中转服务配置
+    "USE_CLAUDE_PROXY": ("true", _to_bool),
+    "CLAUDE_PROXY_API_KEY": ("", str),
+    "CLAUDE_PROXY_BASE_URL": ("https://api.anthropic.com/v1/messages", _intern),
+    "CLAUDE_PROXY_MODEL": ("claude-3-5-sonnet-20241022", _intern),
+    # Direct Anthropic API (fallback)
+    "ANTHROPIC_API_KEY": ("", str),
+
+    # ==================== Gemini Proxy Configuration ====================
+    # Gemini 中转服务配置
+    "USE_GEMINI_PROXY": ("false", _to_bool),
+    "GEMINI_PROXY_API_KEY": ("", str),
+    "GEMINI_PROXY_BASE_URL": ("", _intern),
+    "GEMINI_PROXY_MODEL": ("gemini-1.5-flash", _intern),
+
+    # ==================== Server Configuration ====================
+    # 服务器配置
+    "SERVER_HOST": ("0.0.0.0", _intern),
+    "SERVER_PORT": ("5100", _to_pos_int),
+
+    # ==================== Cache Configuration ====================
+    # 缓存配置
+    # Entry-count limit of the extraction cache
+    "CACHE_MAX_SIZE": ("50", _to_pos_int),
+    # Memory budget for cached data in bytes (256 MB)
+    "CACHE_MAX_BYTES": ("268435456", _to_pos_int),
+    "CACHE_TTL_HOURS": ("24", _to_pos_int),
+    # Per-group TTLs in seconds (CACHE_TTL_DEFAULT falls back to CACHE_TTL_HOURS)
+    "CACHE_TTL_TEMPLATE": ("604800", _to_pos_int),
+    "CACHE_TTL_COMPLETION": ("3600", _to_pos_int),
+    # TTL for cached failures (e.g. an extraction with success=false)
+    "CACHE_NEGATIVE_TTL_SECONDS": ("60", _to_pos_int),
+    # Restart an entry's TTL each time it is read (false: fixed lifetime)
+    "CACHE_TTL_RENEW_ON_HIT": ("true", _to_bool),
+}
+
+
+@dataclass(frozen=True, slots=True)
+class _CacheCfg:
+    """
+    Cache settings, resolved once
+    缓存配置
+    """
+    max_size: int
+    max_bytes: int
+    ttl_seconds: int
+    ttl_ms: int
+
+
+def _build_cache_cfg() -> _CacheCfg:
+    ttl_seconds = __getattr__("CACHE_TTL_HOURS") * 3600
+    return _CacheCfg(
+        max_size=__getattr__("CACHE_MAX_SIZE"),
+        max_bytes=__getattr__("CACHE_MAX_BYTES"),
+        ttl_seconds=ttl_seconds,
+        ttl_ms=ttl_seconds * 1000,
+    )
+
+
+def _build_cache_ttl_seconds() -> Mapping[str, int]:
+    return MappingProxyType({
+        "template": __getattr__("CACHE_TTL_TEMPLATE"),
+        "completion": __getattr__("CACHE_TTL_COMPLETION"),
+        "default": (
+            _env_int("CACHE_TTL_DEFAULT", "0")
+            if _env_str("CACHE_TTL_DEFAULT")
+            else __getattr__("CACHE").ttl_seconds
+        ),
+    })
+
+
+def _build_claude_proxy_url_parts() -> Tuple[str, str, int, str]:
+    parsed = urlsplit(__getattr__("CLAUDE_PROXY_BASE_URL"))
+    scheme = parsed.scheme or "https"
+    return (
+        _intern(scheme),
+        _intern(parsed.hostname or ""),
+        parsed.port or (443 if scheme == "https" else 80),
+        _intern(parsed.path or "/v1/messages"),
+    )
+
+
+def _claude_proxy_url_part(index: int) -> Callable[[], Any]:
+    return lambda: __getattr__("_CLAUDE_PROXY_URL_PARTS")[index]
+
+
+def _build_settings():
+    """
+    Typed, frozen pydantic model of every plain setting (lower-case field
+    names), generated from _DEFAULTS and validated once by pydantic-core
+    类型化的配置对象
+    """
+    from pydantic import ConfigDict, PositiveInt, create_model
+
+    field_types = {_to_bool: bool, _to_pos_int: PositiveInt}
+    settings_model = create_model(
+        "Settings",
+        __config__=ConfigDict(frozen=True),
+        **{
+            name.lower(): (field_types.get(caster, str), ...)
+            for name, (_, caster) in _DEFAULTS.items()
+        },
+    )
+    return settings_model(**{name.lower(): __getattr__(name) for name in _DEFAULTS})
+
+
+def _build_config() -> Mapping[str, Any]:
+    return MappingProxyType({name: __getattr__(name) for name in _DEFAULTS})
+
+
+# Settings derived from other settings: name -> builder
+_DERIVED: Dict[str, Callable[[], Any]] = {
+    "CACHE": _build_cache_cfg,
+    # Entry-count limit (alias of CACHE_MAX_SIZE)
+    "CACHE_MAX_ENTRIES": lambda: __getattr__("CACHE_MAX_SIZE"),
+    # Cache TTL per entry group, in seconds
+    "CACHE_TTL_SECONDS": _build_cache_ttl_seconds,
+    # Default-group cache TTL in milliseconds
+    "CACHE_TTL_MS": lambda: __getattr__("CACHE_TTL_SECONDS")["default"] * 1000,
+    # CLAUDE_PROXY_BASE_URL split once: (scheme, host, port, path)
+    "_CLAUDE_PROXY_URL_PARTS": _build_claude_proxy_url_parts,
+    "CLAUDE_PROXY_SCHEME": _claude_proxy_url_part(0),
+    "CLAUDE_PROXY_HOST": _claude_proxy_url_part(1),
+    "CLAUDE_PROXY_PORT": _claude_proxy_url_part(2),
+    "CLAUDE_PROXY_PATH": _claude_proxy_url_part(3),
+    # Typed settings object (settings.server_port, settings.use_gemini_proxy, ...)
+    "settings": _build_settings,
+    # Read-only snapshot of every plain setting, for callers that share it
+    "CONFIG": _build_config,
+}
 
-# ==================== Claude Proxy Configuration ====================
-# 中转服务配置
+# Resolved settings, filled on first access
+_cache: Dict[str, Any] = {}
 
-USE_CLAUDE_PROXY = True
-CLAUDE_PROXY_API_KEY = os.getenv("CLAUDE_PROXY_API_KEY", "")
-CLAUDE_PROXY_BASE_URL = os.getenv("CLAUDE_PROXY_BASE_URL", "https://api.anthropic.com/v1/messages")
-CLAUDE_PROXY_MODEL = os.getenv("CLAUDE_PROXY_MODEL", "claude-3-5-sonnet-20241022")
 
-# Direct Anthropic API (fallback)
-ANTHROPIC_API_KEY = os.getenv("ANTHROPIC_API_KEY", "")
+def __getattr__(name: str) -> Any:
+    try:
+        return _cache[name]
+    except KeyError:
+        pass
+    if name in _DEFAULTS:
+        default, caster = _DEFAULTS[name]
+        raw = _env_str(name, default)
+        try:
+            value = caster(raw)
+        except ValueError as e:
+            raise RuntimeError(f"Invalid {name}={raw!r}: {e}") from e
+    elif name in _DERIVED:
+        value = _DERIVED[name]()
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    _cache[name] = value
+    return value
 
-# ==================== Gemini Proxy Configuration ====================
-# Gemini 中转服务配置
 
-USE_GEMINI_PROXY = os.getenv("USE_GEMINI_PROXY", "false").lower() == "true"
-GEMINI_PROXY_API_KEY = os.getenv("GEMINI_PROXY_API_KEY", "")
-GEMINI_PROXY_BASE_URL = os.getenv("GEMINI_PROXY_BASE_URL", "")
-GEMINI_PROXY_MODEL = os.getenv("GEMINI_PROXY_MODEL", "gemini-1.5-flash")
+def __dir__():
+    return sorted(set(globals()) | set(_DEFAULTS) | set(_DERIVED))
 
-# ==================== Server Configuration ====================
-# 服务器配置
 
-SERVER_HOST = os.getenv("SERVER_HOST", "0.0.0.0")
-SERVER_PORT = int(os.getenv("SERVER_PORT", "5100"))
+def refresh_environment_cache() -> None:
+    """
+    Re-take the environment snapshot and drop resolved settings
+    (e.g. in tests after changing os.environ)
+    重新读取环境变量快照
+    """
+    global _ENV
+    _ENV = os.environ.copy()
+    _env_str.cache_clear()
+    _env_int.cache_clear()
+    _cache.clear()
 
-# ==================== Cache Configuration ====================
-# 缓存配置
 
-CACHE_MAX_SIZE = int(os.getenv("CACHE_MAX_SIZE", "100"))
-CACHE_TTL_HOURS = int(os.getenv("CACHE_TTL_HOURS", "24"))
+def validate() -> None:
+    """
+    Resolve every numeric setting up front so a bad value fails at startup
+    (RuntimeError naming the variable) instead of on first use. Called from
+    the app's startup hook - importing this module stays lazy.
+    启动时校验数值配置
+    """
+    for name, (_, caster) in _DEFAULTS.items():
+        if caster is _to_pos_int:
+            __getattr__(name)
+    __getattr__("CACHE_TTL_SECONDS")
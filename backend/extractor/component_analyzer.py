@@ -9,6 +9,7 @@ Component Analyzer - Fine-grained Section Extraction from DOM Tree
 - 提取每个Section的完整HTML内容供Worker Agent使用
 """
 
+import heapq
 import logging
 import re
 from typing import Dict, List, Optional, Any, Tuple
@@ -22,6 +23,14 @@ from .models import (
 logger = logging.getLogger(__name__)
 
 
+# clean_html_for_tokens 使用的预编译正则
+_BASE64_IMG_RE = re.compile(r'data:image/[^;]+;base64,[A-Za-z0-9+/=]+', re.IGNORECASE)
+_DATA_URL_RE = re.compile(r'data:[^,]+,[A-Za-z0-9+/=]{100,}', re.IGNORECASE)
+_SVG_RE = re.compile(r'<svg\b[^>]*>.*?</svg>', re.IGNORECASE | re.DOTALL)
+_LONG_STYLE_RE = re.compile(r'style="[^"]{200,}"', re.IGNORECASE)
+_LONG_SRCSET_RE = re.compile(r'srcset="[^"]{500,}"', re.IGNORECASE)
+
+
 def clean_html_for_tokens(html: str) -> str:
     """
     清理 HTML 内容，移除不应计入 token 的部分
@@ -33,6 +42,8 @@ def clean_html_for_tokens(html: str) -> str:
     4. 超长 style 属性 → [STYLES]
     5. 超长 srcset → [SRCSET]
 
+    每一步先用子串检查跳过不可能匹配的情况（替换结果不会引入新的匹配）
+
     Args:
         html: 原始 HTML 字符串
 
@@ -42,47 +53,29 @@ def clean_html_for_tokens(html: str) -> str:
     if not html:
         return ""
 
+    lowered = html.lower()
+
     # 1. 替换 base64 图片数据
     # data:image/png;base64,iVBORw0... → [IMG:base64]
-    html = re.sub(
-        r'data:image/[^;]+;base64,[A-Za-z0-9+/=]+',
-        '[IMG:base64]',
-        html,
-        flags=re.IGNORECASE
-    )
+    if ';base64,' in lowered:
+        html = _BASE64_IMG_RE.sub('[IMG:base64]', html)
 
     # 2. 替换其他 data URLs（超过100字符的）
-    html = re.sub(
-        r'data:[^,]+,[A-Za-z0-9+/=]{100,}',
-        '[DATA:url]',
-        html,
-        flags=re.IGNORECASE
-    )
-
-    # 3. 替换内联 SVG 内容
+    if 'data:' in lowered:
+        html = _DATA_URL_RE.sub('[DATA:url]', html)
+
+    # 3. 替换内联 SVG 内容（没有闭合标签时不可能匹配，避免逐个 <svg 扫到末尾）
     # <svg ...>...</svg> → <svg>[SVG]</svg>
-    html = re.sub(
-        r'<svg[^>]*>[\s\S]*?</svg>',
-        '<svg>[SVG]</svg>',
-        html,
-        flags=re.IGNORECASE
-    )
+    if '<svg' in lowered and '</svg>' in lowered:
+        html = _SVG_RE.sub('<svg>[SVG]</svg>', html)
 
     # 4. 替换超长 style 属性（超过200字符）
-    html = re.sub(
-        r'style="[^"]{200,}"',
-        'style="[LONG_STYLES]"',
-        html,
-        flags=re.IGNORECASE
-    )
+    if 'style="' in lowered:
+        html = _LONG_STYLE_RE.sub('style="[LONG_STYLES]"', html)
 
     # 5. 替换超长 srcset（超过500字符）
-    html = re.sub(
-        r'srcset="[^"]{500,}"',
-        'srcset="[SRCSET]"',
-        html,
-        flags=re.IGNORECASE
-    )
+    if 'srcset="' in lowered:
+        html = _LONG_SRCSET_RE.sub('srcset="[SRCSET]"', html)
 
     return html
 
@@ -191,22 +184,8 @@ class ComponentAnalyzer:
             sections = self._split_large_sections(sections)
             logger.info(f"After splitting large sections: {len(sections)} sections")
 
-            # Step 4: 处理水平并排的Section
-            sections = self._handle_horizontal_layout(sections)
-            logger.info(f"After handling horizontal layout: {len(sections)} sections")
-
-            # Step 5: 去重并处理重叠
-            sections = self._remove_overlaps(sections)
-            logger.info(f"After removing overlaps: {len(sections)} sections")
-
-            # Step 6: 合并间隙到相邻Section（不创建空Section）
-            sections = self._merge_gaps(sections)
-            logger.info(f"After merging gaps: {len(sections)} sections")
-
-            # Step 7: 验证三原则
-            validation = self._validate_three_principles(sections)
-            if validation['errors']:
-                logger.warning(f"Validation errors: {validation['errors']}")
+            # Step 4-7: 水平布局、去重叠、合并间隙、验证三原则
+            sections, validation = self._finalize_sections(sections)
 
             # Step 8: 获取每个Section的HTML内容并创建ComponentInfo
             self.components = await self._create_component_infos(sections)
@@ -261,24 +240,16 @@ class ComponentAnalyzer:
         sections = []
         min_width = self.page_width * self.MIN_SECTION_WIDTH_RATIO
 
-        def estimate_tokens(node: ElementInfo) -> int:
-            """估算节点的token数"""
-            return node.inner_html_length // 4
-
-        def is_valid_section(node: ElementInfo) -> bool:
-            """判断节点是否是有效的Section候选"""
-            tag = node.tag.lower()
-
-            # 跳过无效标签
-            if tag in self.SKIP_TAGS:
-                return False
+        # 每个节点的小写标签和token估算（inner_html_length // 4）只在访问时计算一次，
+        # 作为参数传给下面的辅助函数
 
+        def is_valid_section(node: ElementInfo, tokens: int) -> bool:
+            """判断节点是否是有效的Section候选（调用方已排除 SKIP_TAGS）"""
             # 高度检查
             if node.rect.height < self.MIN_SECTION_HEIGHT:
                 return False
 
             # 宽度检查 - 对于大token节点放宽限制
-            tokens = estimate_tokens(node)
             if node.rect.width < min_width:
                 # 如果token很多，即使较窄也接受（支持并排布局）
                 if tokens < self.LARGE_TOKEN_THRESHOLD:
@@ -286,7 +257,7 @@ class ComponentAnalyzer:
 
             return True
 
-        def create_section_dict(node: ElementInfo) -> Dict[str, Any]:
+        def create_section_dict(node: ElementInfo, tokens: int) -> Dict[str, Any]:
             """从节点创建section字典（统一类型为section）"""
             return {
                 'tag': node.tag,
@@ -311,7 +282,7 @@ class ComponentAnalyzer:
                     'padding': node.styles.padding if node.styles else None,
                 },
                 'inner_html_length': node.inner_html_length,
-                'estimated_tokens': estimate_tokens(node),
+                'estimated_tokens': tokens,
                 'children_count': node.children_count,
                 'children': node.children,  # 保留子节点引用，用于后续拆分
             }
@@ -325,21 +296,21 @@ class ComponentAnalyzer:
             if tag in self.SKIP_TAGS:
                 return result
 
+            tokens = node.inner_html_length // 4
+
             # 检查是否是有效section
-            if not is_valid_section(node):
+            if not is_valid_section(node, tokens):
                 # 即使当前节点无效，仍然检查子节点
                 for child in node.children:
                     result.extend(extract_from_node(child, depth + 1))
                 return result
 
-            tokens = estimate_tokens(node)
-
             # 如果节点太小，跳过
             if tokens < self.MIN_SECTION_TOKENS:
                 return result
 
             # 直接添加为section（不管大小，后续步骤会拆分）
-            result.append(create_section_dict(node))
+            result.append(create_section_dict(node, tokens))
             return result
 
         # 从根节点开始，但跳过html/body等容器，直接从有意义的子元素开始
@@ -403,9 +374,8 @@ class ComponentAnalyzer:
         """
         MAX_RECURSION_DEPTH = 15  # 防止无限递归
 
-        def create_child_section(child) -> Dict:
-            """从ElementInfo创建section字典"""
-            child_tokens = child.inner_html_length // 4
+        def create_child_section(child, child_tokens: int) -> Dict:
+            """从ElementInfo创建section字典（child_tokens 由筛选时算好传入）"""
             return {
                 'tag': child.tag,
                 'id': child.id,
@@ -490,7 +460,7 @@ class ComponentAnalyzer:
                 if child_tokens < self.MIN_SECTION_TOKENS:
                     continue
 
-                valid_children.append(child)
+                valid_children.append((child, child_tokens))
 
             # 如果没有有效子节点，无法拆分
             if not valid_children:
@@ -502,9 +472,8 @@ class ComponentAnalyzer:
 
             # 对每个有效子节点创建section，然后递归拆分
             result = []
-            for child in valid_children:
-                child_section = create_child_section(child)
-                child_tokens = child_section.get('estimated_tokens', 0)
+            for child, child_tokens in valid_children:
+                child_section = create_child_section(child, child_tokens)
 
                 # 递归拆分这个子section
                 # 注意：这里是关键 - 先完全处理一个子section，再处理下一个
@@ -562,6 +531,35 @@ class ComponentAnalyzer:
 
         return result
 
+    def _finalize_sections(self, sections: List[Dict]) -> Tuple[List[Dict], Dict[str, Any]]:
+        """
+        Section 后处理（Step 4-7）：
+        4. 处理水平并排的Section
+        5. 去重并处理重叠
+        6. 合并间隙到相邻Section（不创建空Section）
+        7. 验证三原则
+
+        各步骤依赖上一步的结果（去重叠按水平布局后的顺序决定保留谁，
+        验证检查的是合并间隙后的rect），所以仍按顺序执行
+
+        Returns:
+            (最终的section列表, 验证结果)
+        """
+        sections = self._handle_horizontal_layout(sections)
+        logger.info(f"After handling horizontal layout: {len(sections)} sections")
+
+        sections = self._remove_overlaps(sections)
+        logger.info(f"After removing overlaps: {len(sections)} sections")
+
+        sections = self._merge_gaps(sections)
+        logger.info(f"After merging gaps: {len(sections)} sections")
+
+        validation = self._validate_three_principles(sections)
+        if validation['errors']:
+            logger.warning(f"Validation errors: {validation['errors']}")
+
+        return sections, validation
+
     def _handle_horizontal_layout(self, sections: List[Dict]) -> List[Dict]:
         """
         处理水平并排的布局
@@ -578,19 +576,17 @@ class ComponentAnalyzer:
         # 分组：找出垂直重叠的section组
         groups = []
         current_group = [sections[0]]
+        prev_top = sections[0]['rect']['top']
+        prev_bottom = sections[0]['rect']['bottom']
 
         for i in range(1, len(sections)):
             current = sections[i]
-            prev = current_group[-1]
+            top = current['rect']['top']
+            bottom = current['rect']['bottom']
 
             # 计算垂直重叠
-            overlap_top = max(current['rect']['top'], prev['rect']['top'])
-            overlap_bottom = min(current['rect']['bottom'], prev['rect']['bottom'])
-            overlap_height = max(0, overlap_bottom - overlap_top)
-
-            current_height = current['rect']['bottom'] - current['rect']['top']
-            prev_height = prev['rect']['bottom'] - prev['rect']['top']
-            min_height = min(current_height, prev_height)
+            overlap_height = max(0, min(bottom, prev_bottom) - max(top, prev_top))
+            min_height = min(bottom - top, prev_bottom - prev_top)
 
             # 如果垂直重叠超过30%，认为是同一行（并排）
             if min_height > 0 and overlap_height / min_height > self.HORIZONTAL_OVERLAP_THRESHOLD:
@@ -599,6 +595,7 @@ class ComponentAnalyzer:
                 # 新的一行
                 groups.append(current_group)
                 current_group = [current]
+            prev_top, prev_bottom = top, bottom
 
         groups.append(current_group)
 
@@ -620,46 +617,50 @@ class ComponentAnalyzer:
         if len(sections) <= 1:
             return sections
 
-        kept = []
+        # 每个section的矩形只解包一次：(left, right, top, bottom, area)
+        kept: List[Tuple[Tuple[float, float, float, float, float], Dict]] = []
 
         for section in sections:
             s_rect = section['rect']
-            s_area = s_rect['width'] * s_rect['height']
+            s_box = (s_rect['left'], s_rect['right'], s_rect['top'], s_rect['bottom'],
+                     s_rect['width'] * s_rect['height'])
+            s_left, s_right, s_top, s_bottom, s_area = s_box
+            s_tokens = section['estimated_tokens']
 
             is_redundant = False
-            remove_existing = None
+            remove_index = None
 
-            for k in kept:
-                k_rect = k['rect']
+            for index, (k_box, k) in enumerate(kept):
+                k_left, k_right, k_top, k_bottom, k_area = k_box
 
-                # 计算重叠区域
-                overlap_left = max(s_rect['left'], k_rect['left'])
-                overlap_right = min(s_rect['right'], k_rect['right'])
-                overlap_top = max(s_rect['top'], k_rect['top'])
-                overlap_bottom = min(s_rect['bottom'], k_rect['bottom'])
+                # 不相交则重叠面积为0，直接跳过
+                if k_left >= s_right or k_right <= s_left or k_top >= s_bottom or k_bottom <= s_top:
+                    continue
 
-                overlap_width = max(0, overlap_right - overlap_left)
-                overlap_height = max(0, overlap_bottom - overlap_top)
-                overlap_area = overlap_width * overlap_height
+                # 计算重叠区域
+                overlap_area = (
+                    (min(s_right, k_right) - max(s_left, k_left))
+                    * (min(s_bottom, k_bottom) - max(s_top, k_top))
+                )
 
                 # 如果重叠超过较小区域的50%，认为是重叠
-                min_area = min(s_area, k_rect['width'] * k_rect['height'])
+                min_area = min(s_area, k_area)
                 if min_area > 0 and overlap_area / min_area > 0.5:
                     # 保留token更多的那个
-                    if section['estimated_tokens'] > k['estimated_tokens']:
-                        remove_existing = k
+                    if s_tokens > k['estimated_tokens']:
+                        remove_index = index
                         break
                     else:
                         is_redundant = True
                         break
 
-            if remove_existing:
-                kept.remove(remove_existing)
-                kept.append(section)
+            if remove_index is not None:
+                del kept[remove_index]
+                kept.append((s_box, section))
             elif not is_redundant:
-                kept.append(section)
+                kept.append((s_box, section))
 
-        return kept
+        return [section for _, section in kept]
 
     def _merge_gaps(self, sections: List[Dict]) -> List[Dict]:
         """
@@ -715,41 +716,55 @@ class ComponentAnalyzer:
         errors = []
         warnings = []
 
+        # 一次遍历：解包矩形、累计覆盖面积（原则2）、检查token大小（原则3）
+        boxes: List[Tuple[float, float, float, float]] = []  # (top, bottom, left, right)
+        total_coverage = 0
+        for i, s in enumerate(sections):
+            rect = s['rect']
+            boxes.append((rect['top'], rect['bottom'], rect['left'], rect['right']))
+            total_coverage += rect['width'] * rect['height']
+
+            tokens = s.get('estimated_tokens', 0)
+            if tokens > self.MAX_SECTION_TOKENS:
+                errors.append(f"Section {i+1} exceeds {self.MAX_SECTION_TOKENS} tokens: {tokens} tokens")
+
         # 原则1：检查重叠
-        for i, s1 in enumerate(sections):
-            for j, s2 in enumerate(sections):
-                if i >= j:
-                    continue
+        # 扫描线：按 top 排序，只和 Y 方向仍然相交的活动 section 比较
+        overlaps = []
+        active: List[Tuple[float, int]] = []  # 最小堆 (bottom, index)
+        for i in sorted(range(len(boxes)), key=lambda idx: boxes[idx][0]):
+            top, bottom, left, right = boxes[i]
+            while active and active[0][0] <= top:
+                heapq.heappop(active)
+
+            for _, j in active:
+                j_top, j_bottom, j_left, j_right = boxes[j]
 
                 # 计算重叠
-                overlap_left = max(s1['rect']['left'], s2['rect']['left'])
-                overlap_right = min(s1['rect']['right'], s2['rect']['right'])
-                overlap_top = max(s1['rect']['top'], s2['rect']['top'])
-                overlap_bottom = min(s1['rect']['bottom'], s2['rect']['bottom'])
+                overlap_left = max(left, j_left)
+                overlap_right = min(right, j_right)
+                overlap_top = max(top, j_top)
+                overlap_bottom = min(bottom, j_bottom)
 
                 if overlap_left < overlap_right and overlap_top < overlap_bottom:
                     overlap_area = (overlap_right - overlap_left) * (overlap_bottom - overlap_top)
                     if overlap_area > 100:  # 超过100平方像素的重叠
-                        warnings.append(f"Overlap detected: section {i+1} and section {j+1} ({overlap_area:.0f}px²)")
+                        overlaps.append((min(i, j), max(i, j), overlap_area))
+
+            if bottom > top:
+                heapq.heappush(active, (bottom, i))
+
+        for i, j, overlap_area in sorted(overlaps):
+            warnings.append(f"Overlap detected: section {i+1} and section {j+1} ({overlap_area:.0f}px²)")
 
         # 原则2：检查覆盖率
         if sections:
-            total_coverage = 0
-            for s in sections:
-                total_coverage += s['rect']['width'] * s['rect']['height']
-
             page_area = self.page_width * self.page_height
             coverage_ratio = total_coverage / page_area if page_area > 0 else 0
 
             if coverage_ratio < 0.8:
                 warnings.append(f"Low coverage: {coverage_ratio*100:.1f}% of page area")
 
-        # 原则3：检查token大小
-        for i, s in enumerate(sections):
-            tokens = s.get('estimated_tokens', 0)
-            if tokens > self.MAX_SECTION_TOKENS:
-                errors.append(f"Section {i+1} exceeds {self.MAX_SECTION_TOKENS} tokens: {tokens} tokens")
-
         return {
             'errors': errors,
             'warnings': warnings,
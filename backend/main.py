@@ -22,10 +22,9 @@ if sys.platform == 'win32':
 
 import os
 import logging
-from dotenv import load_dotenv
 
-# Load environment variables
-load_dotenv()
+# Load environment variables (.env handling lives in code_gen_config)
+import code_gen_config
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
@@ -116,9 +115,14 @@ except ImportError as e:
 
 # Checkpoint module (project state checkpoints)
 try:
+    from fastapi.staticfiles import StaticFiles
     from checkpoint.routes import router as checkpoint_router
+    from checkpoint.checkpoint_store import THUMBNAILS_DIR
     app.include_router(checkpoint_router)
-    logger.info("Registered: /api/checkpoints/*")
+    # Served as files (ETag / 304 handled by StaticFiles)
+    THUMBNAILS_DIR.mkdir(parents=True, exist_ok=True)
+    app.mount("/thumbnails", StaticFiles(directory=THUMBNAILS_DIR), name="thumbnails")
+    logger.info("Registered: /api/checkpoints/*, /thumbnails/*")
 except ImportError as e:
     logger.warning(f"Checkpoint module not available: {e}")
 
@@ -251,6 +255,9 @@ async def startup_event():
     logger.info("Perfect Web Clone API Starting...")
     logger.info("=" * 50)
 
+    # Fail fast on malformed numeric settings (RuntimeError naming the variable)
+    code_gen_config.validate()
+
     # Clean up BoxLite dev server port (8080) on startup
     dev_port = int(os.getenv("BOXLITE_DEV_PORT", "8080"))
     logger.info(f"Cleaning up port {dev_port} for BoxLite dev server...")
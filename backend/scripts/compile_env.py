@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+Compile backend/.env into backend/env_compiled.py (a plain dict literal) so
+code_gen_config can import it instead of parsing .env on every start.
+Re-run after editing .env; a stale compiled file is ignored automatically.
+
+Usage: python scripts/compile_env.py
+"""
+
+import sys
+from pathlib import Path
+from dotenv import dotenv_values
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+ENV_FILE = BACKEND_DIR / ".env"
+OUTPUT_FILE = BACKEND_DIR / "env_compiled.py"
+
+
+def compile_env() -> int:
+    """Write env_compiled.py and return the number of variables compiled."""
+    values = {k: v for k, v in dotenv_values(ENV_FILE).items() if v is not None}
+    OUTPUT_FILE.write_text(
+        "# Generated by scripts/compile_env.py from .env - do not edit\n"
+        f"SOURCE_MTIME_NS = {ENV_FILE.stat().st_mtime_ns!r}\n"
+        f"ENV = {values!r}\n",
+        encoding="utf-8",
+    )
+    return len(values)
+
+
+if __name__ == "__main__":
+    if not ENV_FILE.exists():
+        print(f"No .env file at {ENV_FILE}")
+        sys.exit(1)
+    count = compile_env()
+    print(f"Compiled {count} variables to {OUTPUT_FILE}")
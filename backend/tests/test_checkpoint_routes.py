@@ -0,0 +1,134 @@
+"""
+Checkpoint API 路由测试
+
+测试检查点路由对 thumbnail 和 ID 的校验。
+
+运行测试：
+    cd backend
+    pytest tests/test_checkpoint_routes.py -v
+"""
+
+import base64
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+# 确保可以导入 checkpoint 模块
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from checkpoint import routes
+from checkpoint.checkpoint_store import CheckpointStore
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    """使用临时数据目录的路由测试客户端"""
+    store = CheckpointStore(data_dir=tmp_path / "checkpoints")
+    monkeypatch.setattr(routes, "checkpoint_store", store)
+    app = FastAPI()
+    app.include_router(routes.router)
+    with TestClient(app) as test_client:
+        yield test_client
+    store.flush()
+
+
+def _create(client, **fields):
+    return client.post("/api/checkpoints/projects", json={"name": "Thumbnail test", **fields})
+
+
+# ============================================
+# Thumbnail 校验测试
+# ============================================
+
+class TestThumbnailValidation:
+    """thumbnail 字段校验测试"""
+
+    @pytest.mark.parametrize("thumbnail", [
+        None,
+        "/thumbnails/site.png",
+        "/thumbnails/showcase/site.jpg",
+        "https://example.com/thumb.png",
+        "http://localhost:5100/thumbnails/site.png",
+    ])
+    def test_create_accepts_valid_thumbnail(self, client, thumbnail):
+        """测试：接受 URL 路径和 http(s) URL"""
+        response = _create(client, thumbnail=thumbnail)
+
+        assert response.status_code == 200
+        assert response.json()["project"]["thumbnail"] == thumbnail
+
+    def test_create_rejects_inline_image(self, client):
+        """测试：拒绝内联的 base64 图片（超长）"""
+        image = base64.b64encode(b"\x89PNG" + b"\0" * 4096).decode()
+        response = _create(client, thumbnail=f"data:image/png;base64,{image}")
+
+        assert response.status_code == 400
+        assert client.get("/api/checkpoints/projects").json()["count"] == 0
+
+    def test_create_rejects_oversized_url(self, client):
+        """测试：拒绝超过长度上限的 URL"""
+        thumbnail = "https://example.com/" + "a" * routes.THUMBNAIL_MAX_LENGTH
+        response = _create(client, thumbnail=thumbnail)
+
+        assert response.status_code == 400
+
+    @pytest.mark.parametrize("thumbnail", [
+        "data:image/png;base64,iVBORw0KGgo=",
+        "site.png",
+        "/static/site.png",
+        "/thumbnails/",
+        "/thumbnails/../manifest.json",
+        "/thumbnails/a//b.png",
+        "/thumbnails/./site.png",
+        "/thumbnails/..\\secret.png",
+        "ftp://example.com/thumb.png",
+    ])
+    def test_create_rejects_malformed_thumbnail(self, client, thumbnail):
+        """测试：拒绝不是 URL 的 thumbnail"""
+        response = _create(client, thumbnail=thumbnail)
+
+        assert response.status_code == 400
+        assert "thumbnail" in response.json()["detail"]
+
+    def test_update_validates_thumbnail(self, client):
+        """测试：更新项目时同样校验 thumbnail"""
+        project_id = _create(client).json()["project"]["id"]
+        url = f"/api/checkpoints/projects/{project_id}"
+
+        assert client.patch(url, json={"thumbnail": "data:image/png;base64,AAAA"}).status_code == 400
+        response = client.patch(url, json={"thumbnail": "/thumbnails/new.png"})
+        assert response.status_code == 200
+        assert response.json()["project"]["thumbnail"] == "/thumbnails/new.png"
+
+
+# ============================================
+# ID 校验测试
+# ============================================
+
+class TestIdValidation:
+    """项目/检查点 ID 校验测试"""
+
+    @pytest.mark.parametrize("project_id", [".hidden", "%2E%2E", "a:b", "a*b", "x" * 129])
+    def test_rejects_unsafe_project_id(self, client, project_id):
+        """测试：拒绝不能作为文件名的项目 ID"""
+        response = client.get(f"/api/checkpoints/projects/{project_id}")
+
+        assert response.status_code == 400
+
+    def test_rejects_unsafe_checkpoint_id(self, client):
+        """测试：拒绝不能作为文件名的检查点 ID"""
+        project_id = _create(client).json()["project"]["id"]
+
+        response = client.get(f"/api/checkpoints/projects/{project_id}/.cp_001")
+        assert response.status_code == 400
+
+    def test_accepts_valid_ids(self, client):
+        """测试：合法 ID 正常访问（不存在时返回 404）"""
+        project_id = _create(client).json()["project"]["id"]
+
+        assert client.get(f"/api/checkpoints/projects/{project_id}").status_code == 200
+        assert client.get(f"/api/checkpoints/projects/{project_id}/cp_001").status_code == 404
+        assert client.get("/api/checkpoints/projects/missing-project").status_code == 404
@@ -0,0 +1,290 @@
+"""
+Checkpoint 存储测试
+
+测试 CheckpointStore 的并发安全性和存储格式（blob、对话增量、追加日志）。
+
+运行测试：
+    cd backend
+    pytest tests/test_checkpoint_store.py -v
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+# 确保可以导入 checkpoint 模块
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from checkpoint.checkpoint_store import (
+    BLOBS_DIR,
+    CONVERSATION_CHAIN_MAX,
+    INDEX_FILE,
+    LOG_FILE,
+    _RECORD_HEADER,
+    CheckpointStore,
+)
+
+
+@pytest.fixture
+def store(tmp_path):
+    """每个测试使用独立数据目录的 CheckpointStore"""
+    store = CheckpointStore(data_dir=tmp_path / "checkpoints")
+    yield store
+    store.flush()
+
+
+# ============================================
+# 并发测试
+# ============================================
+
+class TestConcurrency:
+    """并发保存/删除测试"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_saves_keep_every_checkpoint(self, store):
+        """测试：同一项目的并发保存不会丢失检查点"""
+        project = store.create_project("Concurrent")
+
+        results = await asyncio.gather(*(
+            asyncio.to_thread(
+                store.save_checkpoint,
+                project.id,
+                f"save {i}",
+                [{"role": "user", "content": f"message {i}"}],
+                {"/src/App.jsx": f"export default {i}"},
+            )
+            for i in range(8)
+        ))
+
+        ids = sorted(cp.id for cp in results)
+        assert ids == [f"cp_{n:03d}" for n in range(1, 9)]
+        assert sorted(store.get_project(project.id).checkpoints) == ids
+        for cp in results:
+            loaded = store.get_checkpoint(project.id, cp.id)
+            assert loaded.files == cp.files
+            assert loaded.conversation == cp.conversation
+
+    @pytest.mark.asyncio
+    async def test_delete_during_saves_keeps_referenced_blobs(self, store):
+        """测试：保存进行中删除检查点不会清理仍被引用的 blob"""
+        project = store.create_project("Concurrent delete")
+        shared = {"/src/shared.js": "export const shared = 1"}
+        first = store.save_checkpoint(project.id, "first", [], shared)
+
+        saves = [
+            asyncio.to_thread(store.save_checkpoint, project.id, f"save {i}", [], shared)
+            for i in range(4)
+        ]
+        delete = asyncio.to_thread(store.delete_checkpoint, project.id, first.id)
+        results = await asyncio.gather(*saves, delete)
+
+        assert results[-1] is True
+        remaining = store.get_project(project.id).checkpoints
+        assert first.id not in remaining
+        assert len(remaining) == 4
+        for cp_id in remaining:
+            assert store.get_checkpoint(project.id, cp_id).files == shared
+
+    @pytest.mark.asyncio
+    async def test_list_projects_while_creating(self, store):
+        """测试：创建项目的同时列出项目不会出错"""
+        async def list_repeatedly():
+            for _ in range(50):
+                await asyncio.to_thread(store.list_projects)
+
+        await asyncio.gather(
+            list_repeatedly(),
+            *(asyncio.to_thread(store.create_project, f"Project {i}") for i in range(20)),
+        )
+
+        assert len(store.list_projects()) == 20
+
+
+# ============================================
+# 存储格式往返测试
+# ============================================
+
+def _blob_digests(store, project_id):
+    """项目 blob 存储中现有的 sha256 列表"""
+    blobs_dir = store.data_dir / project_id / BLOBS_DIR
+    return sorted(path.name for path in blobs_dir.glob("*/*"))
+
+
+def _record(store, project_id, checkpoint_id):
+    """检查点在日志中的原始记录"""
+    return store._load_checkpoint_data(store.data_dir / project_id, checkpoint_id)
+
+
+class TestSaveLoadDelete:
+    """保存/读取/删除与 blob 清理测试"""
+
+    def test_round_trip(self, store):
+        """测试：保存后读取得到相同的文件和对话"""
+        project = store.create_project("Round trip")
+        files = {"/src/App.jsx": "export default () => <h1>你好</h1>", "/index.html": "<div id='root'></div>"}
+        conversation = [{"role": "user", "content": "clone this"}]
+
+        saved = store.save_checkpoint(project.id, "first", conversation, files, {"step": 1})
+        loaded = store.get_checkpoint(project.id, saved.id)
+
+        assert loaded.files == files
+        assert loaded.conversation == conversation
+        assert loaded.metadata == {"step": 1}
+        assert loaded.files_count == 2
+        assert loaded.total_size == sum(len(c.encode("utf-8")) for c in files.values())
+        assert store.get_checkpoint(project.id, saved.id, include_files=False).files == {}
+
+    def test_reopened_store_reads_checkpoints(self, store):
+        """测试：新的 store 实例能读到已落盘的项目和检查点"""
+        project = store.create_project("Reopen")
+        saved = store.save_checkpoint(project.id, "first", [], {"/a.js": "a"})
+        store.flush()
+
+        reopened = CheckpointStore(data_dir=store.data_dir)
+        assert [p.id for p in reopened.list_projects()] == [project.id]
+        assert reopened.get_checkpoint(project.id, saved.id).files == {"/a.js": "a"}
+
+    def test_identical_files_share_a_blob(self, store):
+        """测试：相同内容只存一个 blob"""
+        project = store.create_project("Dedupe")
+        store.save_checkpoint(project.id, "one", [], {"/a.js": "same", "/b.js": "same"})
+        store.save_checkpoint(project.id, "two", [], {"/a.js": "same", "/c.js": "other"})
+
+        assert len(_blob_digests(store, project.id)) == 2
+
+    def test_delete_prunes_only_unreferenced_blobs(self, store):
+        """测试：删除检查点只清理不再被引用的 blob"""
+        project = store.create_project("Prune")
+        first = store.save_checkpoint(project.id, "one", [], {"/shared.js": "shared", "/old.js": "old"})
+        second = store.save_checkpoint(project.id, "two", [], {"/shared.js": "shared", "/new.js": "new"})
+        before = _blob_digests(store, project.id)
+
+        assert store.delete_checkpoint(project.id, first.id)
+
+        after = _blob_digests(store, project.id)
+        assert len(before) == 3 and len(after) == 2
+        assert store.get_checkpoint(project.id, first.id) is None
+        assert store.get_checkpoint(project.id, second.id).files == {"/shared.js": "shared", "/new.js": "new"}
+        assert store.get_project(project.id).current_checkpoint == second.id
+
+        assert store.delete_checkpoint(project.id, second.id)
+        assert _blob_digests(store, project.id) == []
+        assert not store.delete_checkpoint(project.id, second.id)
+
+    def test_new_id_follows_highest_after_delete(self, store):
+        """测试：删除较早的检查点后，新 ID 不会与现有检查点冲突"""
+        project = store.create_project("Ids")
+        first = store.save_checkpoint(project.id, "one", [], {"/a.js": "one"})
+        store.save_checkpoint(project.id, "two", [], {"/a.js": "two"})
+        store.delete_checkpoint(project.id, first.id)
+
+        third = store.save_checkpoint(project.id, "three", [], {"/a.js": "three"})
+        assert third.id == "cp_003"
+        assert store.get_checkpoint(project.id, "cp_002").files == {"/a.js": "two"}
+
+    def test_compaction_keeps_live_records(self, store):
+        """测试：日志压缩后剩余检查点仍可读取"""
+        project = store.create_project("Compact")
+        saved = [
+            store.save_checkpoint(project.id, f"cp {i}", [], {"/file.js": f"version {i}" * 100})
+            for i in range(6)
+        ]
+        for cp in saved[:5]:
+            assert store.delete_checkpoint(project.id, cp.id)
+
+        project_dir = store.data_dir / project.id
+        logs = list(project_dir.glob("*.log"))
+        assert len(logs) == 1 and logs[0].name != LOG_FILE  # Rewritten under a new name
+        assert store.get_checkpoint(project.id, saved[-1].id).files == {"/file.js": "version 5" * 100}
+
+
+class TestConversationDelta:
+    """对话增量存储测试"""
+
+    def test_extending_conversation_is_stored_as_tail(self, store):
+        """测试：延续上一个检查点的对话只存新增消息"""
+        project = store.create_project("Delta")
+        base = [{"role": "user", "content": "hi"}, {"role": "assistant", "content": "hello"}]
+        extended = base + [{"role": "user", "content": "more"}]
+        first = store.save_checkpoint(project.id, "one", base, {})
+        second = store.save_checkpoint(project.id, "two", extended, {})
+
+        record = _record(store, project.id, second.id)
+        assert record["conversation_base"] == first.id
+        assert record["conversation_tail"] == extended[2:]
+        assert "conversation" not in record
+        assert store.get_checkpoint(project.id, second.id).conversation == extended
+
+    def test_diverging_conversation_is_stored_in_full(self, store):
+        """测试：与上一个检查点不同的对话完整存储"""
+        project = store.create_project("Diverge")
+        store.save_checkpoint(project.id, "one", [{"role": "user", "content": "a"}], {})
+        second = store.save_checkpoint(project.id, "two", [{"role": "user", "content": "b"}], {})
+
+        record = _record(store, project.id, second.id)
+        assert "conversation_base" not in record
+        assert store.get_checkpoint(project.id, second.id).conversation == [{"role": "user", "content": "b"}]
+
+    def test_chain_is_bounded(self, store):
+        """测试：增量链长度受 CONVERSATION_CHAIN_MAX 限制"""
+        project = store.create_project("Chain")
+        conversation = []
+        saved = []
+        for i in range(CONVERSATION_CHAIN_MAX * 2 + 3):
+            conversation = conversation + [{"role": "user", "content": f"message {i}"}]
+            saved.append((store.save_checkpoint(project.id, f"cp {i}", conversation, {}), conversation))
+
+        for cp, expected in saved:
+            assert _record(store, project.id, cp.id).get("conversation_depth", 0) <= CONVERSATION_CHAIN_MAX
+            assert store.get_checkpoint(project.id, cp.id).conversation == expected
+
+    def test_deleting_base_rebases_dependents(self, store):
+        """测试：删除被引用的检查点后，依赖它的检查点对话完整"""
+        project = store.create_project("Rebase")
+        conversations = [[{"role": "user", "content": str(n)} for n in range(i + 1)] for i in range(3)]
+        saved = [store.save_checkpoint(project.id, f"cp {i}", c, {}) for i, c in enumerate(conversations)]
+
+        assert store.delete_checkpoint(project.id, saved[0].id)
+        assert store.delete_checkpoint(project.id, saved[1].id)
+
+        assert store.get_checkpoint(project.id, saved[2].id).conversation == conversations[2]
+        assert "conversation_base" not in _record(store, project.id, saved[2].id)
+
+
+class TestLogRecovery:
+    """日志写入中断后的恢复测试"""
+
+    def test_half_written_record_is_ignored(self, store):
+        """测试：日志末尾残留半条记录时，已有检查点可读且可继续保存"""
+        project = store.create_project("Crash")
+        first = store.save_checkpoint(project.id, "one", [{"role": "user", "content": "a"}], {"/a.js": "a"})
+        store.flush()
+
+        # Simulate a crash mid-append: a record header and partial JSON, index not updated
+        log_path = store.data_dir / project.id / LOG_FILE
+        with open(log_path, "ab") as f:
+            f.write(_RECORD_HEADER.pack(0) + b'{"id":"cp_002","name":"tw')
+
+        reopened = CheckpointStore(data_dir=store.data_dir)
+        assert reopened.get_checkpoint(project.id, first.id).files == {"/a.js": "a"}
+
+        second = reopened.save_checkpoint(
+            project.id, "two", [{"role": "user", "content": "a"}, {"role": "user", "content": "b"}], {"/b.js": "b"}
+        )
+        assert second.id == "cp_002"
+        assert reopened.get_checkpoint(project.id, second.id).files == {"/b.js": "b"}
+        assert len(reopened.get_checkpoint(project.id, second.id).conversation) == 2
+        assert reopened.get_checkpoint(project.id, first.id).conversation == [{"role": "user", "content": "a"}]
+        reopened.flush()
+
+    def test_unreadable_index_is_rebuilt(self, store):
+        """测试：项目索引文件损坏时从项目目录重建"""
+        project = store.create_project("Index")
+        store.flush()
+        (store.data_dir / INDEX_FILE).write_bytes(b'{"trunc')
+
+        reopened = CheckpointStore(data_dir=store.data_dir)
+        assert [p.id for p in reopened.list_projects()] == [project.id]
+        reopened.flush()
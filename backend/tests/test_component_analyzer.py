@@ -0,0 +1,62 @@
+"""
+HTML 清理（clean_html_for_tokens）测试
+
+固定各项替换的输出，包括 data URL / <svg> 匹配跨过属性引号时
+先替换的步骤决定后续结果的情况。
+
+运行测试：
+    cd backend
+    pytest tests/test_component_analyzer.py -v
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# 确保可以导入 extractor 模块
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from extractor.component_analyzer import clean_html_for_tokens
+
+
+class TestCleanHtmlForTokens:
+    """clean_html_for_tokens 替换测试"""
+
+    @pytest.mark.parametrize("html, expected", [
+        ("", ""),
+        ("<p>hi</p>", "<p>hi</p>"),
+        ('<img src="data:image/png;base64,AAAA">', '<img src="[IMG:base64]">'),
+        ('<a href="data:text/plain,' + "B" * 120 + '">', '<a href="[DATA:url]">'),
+        ('<a href="data:text/plain,' + "B" * 50 + '">', '<a href="data:text/plain,' + "B" * 50 + '">'),
+        ('<SVG width="1"><path/></svg>', "<svg>[SVG]</svg>"),
+        ("<svg>x", "<svg>x"),
+        ('<div STYLE="' + "a" * 250 + '">', '<div style="[LONG_STYLES]">'),
+        ('<div style="' + "a" * 150 + '">', '<div style="' + "a" * 150 + '">'),
+        ('<img srcset="' + "c" * 600 + '">', '<img srcset="[SRCSET]">'),
+    ])
+    def test_replacements(self, html, expected):
+        """测试：各项替换及未达到阈值时保持原样"""
+        assert clean_html_for_tokens(html) == expected
+
+    def test_svg_needs_word_boundary(self):
+        """测试：<svgfoo> 之类的标签不当作 SVG"""
+        assert clean_html_for_tokens("<svgfoo>x</svg>") == "<svgfoo>x</svg>"
+
+    def test_style_length_is_checked_after_svg_replacement(self):
+        """测试：跨过引号的 <svg> 先被替换，style 按替换后的长度判断"""
+        html = 'style="' + "b" * 140 + "<svg,>" + "x" * 60 + '"</svg>'
+
+        assert clean_html_for_tokens(html) == 'style="' + "b" * 140 + "<svg>[SVG]</svg>"
+
+    def test_data_url_crossing_quote_is_replaced_first(self):
+        """测试：跨过引号的 data URL 先被替换，之后不再是超长 style"""
+        html = 'style="data:' + "b" * 200 + '",' + "b" * 100
+
+        assert clean_html_for_tokens(html) == 'style="[DATA:url]'
+
+    def test_base64_image_inside_long_style(self):
+        """测试：style 中的 base64 图片替换后不足阈值则保留 style"""
+        html = '<div style="background:url(data:image/png;base64,' + "A" * 300 + ')">'
+
+        assert clean_html_for_tokens(html) == '<div style="background:url([IMG:base64])">'
@@ -0,0 +1,137 @@
+"""
+提取缓存（MemoryStore）测试
+
+测试按条目数/字节数淘汰、分组 TTL、失败结果的短 TTL 和命中续期。
+
+运行测试：
+    cd backend
+    pytest tests/test_memory_store.py -v
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+# 确保可以导入 cache 模块
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from cache.memory_store import CacheEntry, MemoryStore
+
+
+def _payload(size: int) -> dict:
+    """JSON 编码后恰好 size 字节的提取数据"""
+    overhead = len('{"html": ""}')
+    return {"html": "x" * (size - overhead)}
+
+
+def _age(store: MemoryStore, entry_id: str, seconds: float):
+    """把条目的创建时间往前推，模拟时间流逝"""
+    entry = store._store[entry_id]
+    entry.timestamp -= seconds
+    entry.expires -= seconds
+
+
+# ============================================
+# 淘汰测试
+# ============================================
+
+class TestEviction:
+    """容量淘汰测试"""
+
+    def test_size_bytes_matches_payload(self):
+        """测试：条目大小按 JSON 编码长度计算"""
+        entry = CacheEntry(id="a", url="u", title=None, data=_payload(1000), timestamp=time.time())
+
+        assert entry.size_bytes == 1000
+
+    def test_evicts_oldest_over_byte_budget(self):
+        """测试：超出字节预算时淘汰最旧的条目"""
+        store = MemoryStore(max_entries=10, max_bytes=2500)
+        first = store.store("https://a.test", _payload(1000))
+        _age(store, first, 2)
+        second = store.store("https://b.test", _payload(1000))
+        _age(store, second, 1)
+        third = store.store("https://c.test", _payload(1000))
+
+        assert store.get(first) is None
+        assert store.get(second) is not None
+        assert store.get(third) is not None
+        assert store.stats()["total_size_bytes"] == 2000
+
+    def test_large_entry_evicts_several(self):
+        """测试：一个大条目可以挤出多个旧条目"""
+        store = MemoryStore(max_entries=10, max_bytes=3000)
+        ids = []
+        for i in range(3):
+            ids.append(store.store(f"https://{i}.test", _payload(1000)))
+            _age(store, ids[-1], 10 - i)
+        big = store.store("https://big.test", _payload(2500))
+
+        assert [store.get(i) for i in ids] == [None, None, None]
+        assert store.get(big) is not None
+        assert store.stats()["total_size_bytes"] == 2500
+
+    def test_evicts_by_entry_count(self):
+        """测试：超过条目数上限时淘汰最旧的条目"""
+        store = MemoryStore(max_entries=2)
+        first = store.store("https://a.test", _payload(100))
+        _age(store, first, 1)
+        store.store("https://b.test", _payload(100))
+        store.store("https://c.test", _payload(100))
+
+        assert store.get(first) is None
+        assert store.stats()["total_entries"] == 2
+
+    def test_byte_total_tracks_deletes(self):
+        """测试：删除/清空后字节统计同步更新"""
+        store = MemoryStore(max_entries=10, max_bytes=10000)
+        first = store.store("https://a.test", _payload(1000))
+        store.store("https://b.test", _payload(500))
+
+        assert store.delete(first)
+        assert store.stats()["total_size_bytes"] == 500
+        store.clear()
+        assert store.stats()["total_size_bytes"] == 0
+
+
+# ============================================
+# TTL 测试
+# ============================================
+
+class TestTtl:
+    """TTL 分组、失败结果和续期测试"""
+
+    def test_group_ttl(self):
+        """测试：分组使用各自配置的 TTL，未知分组用默认值"""
+        store = MemoryStore(default_ttl=100, group_ttls={"template": 1000})
+
+        assert store.get(store.store("https://a.test", {}, group="template")).ttl == 1000
+        assert store.get(store.store("https://b.test", {}, group="other")).ttl == 100
+        assert store.get(store.store("https://c.test", {}, ttl=5, group="template")).ttl == 5
+
+    def test_failed_result_uses_negative_ttl(self):
+        """测试：success=False 的结果使用短 TTL"""
+        store = MemoryStore(default_ttl=100, group_ttls={"template": 1000}, negative_ttl=10)
+
+        failed = store.store("https://a.test", {"success": False}, group="template")
+        ok = store.store("https://b.test", {"success": True})
+        assert store.get(failed).ttl == 10
+        assert store.get(ok).ttl == 100
+
+        _age(store, failed, 11)
+        assert store.get(failed) is None
+        assert store.get_by_url("https://a.test") is None
+
+    @pytest.mark.parametrize("renew_on_hit", [True, False])
+    def test_renew_on_hit(self, renew_on_hit):
+        """测试：开启续期时读取会重置 TTL"""
+        store = MemoryStore(default_ttl=100, renew_on_hit=renew_on_hit)
+        entry_id = store.store("https://a.test", {})
+        _age(store, entry_id, 90)
+
+        store.get(entry_id)
+        _age(store, entry_id, 20)
+
+        assert (store.get(entry_id) is not None) == renew_on_hit
@@ -0,0 +1,86 @@
+"""
+工具调用守卫（ToolInvocationGuard）测试
+
+测试 ONCE_PER_SOURCE 策略在历史记录裁剪和 reset() 之后的行为。
+
+运行测试：
+    cd backend
+    pytest tests/test_tool_guard.py -v
+"""
+
+import sys
+from pathlib import Path
+
+# 确保可以导入 boxlite 模块
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from boxlite.tool_guard import MAX_HISTORY_PER_TOOL, ToolInvocationGuard
+
+TOOL = "spawn_section_workers"  # ONCE_PER_SOURCE
+
+
+class TestOncePerSource:
+    """ONCE_PER_SOURCE 策略测试"""
+
+    def test_blocks_same_source_only(self):
+        """测试：同一 source 成功调用后被拦截，其他 source 不受影响"""
+        guard = ToolInvocationGuard()
+        assert guard.can_invoke(TOOL, "a")
+
+        guard.mark_invoked(TOOL, "a")
+
+        assert not guard.can_invoke(TOOL, "a")
+        assert guard.can_invoke(TOOL, "b")
+
+    def test_failed_invocation_does_not_block(self):
+        """测试：失败的调用不阻止重试"""
+        guard = ToolInvocationGuard()
+        guard.mark_invoked(TOOL, "a", success=False)
+
+        assert guard.can_invoke(TOOL, "a")
+
+    def test_current_source_is_used_by_default(self):
+        """测试：未传 source_id 时使用当前 source"""
+        guard = ToolInvocationGuard()
+        guard.set_current_source("a")
+        guard.mark_invoked(TOOL)
+
+        assert not guard.can_invoke(TOOL)
+        guard.set_current_source("b")
+        assert guard.can_invoke(TOOL)
+
+    def test_still_blocked_after_history_trimming(self):
+        """测试：成功记录被裁剪出历史后仍然拦截"""
+        guard = ToolInvocationGuard()
+        guard.mark_invoked(TOOL, "a")
+        for i in range(MAX_HISTORY_PER_TOOL * 2):
+            guard.mark_invoked(TOOL, f"other-{i}", success=False)
+
+        assert len(guard._invocations[TOOL]) == MAX_HISTORY_PER_TOOL
+        assert all(record.source_id != "a" for record in guard._invocations[TOOL])
+        assert not guard.can_invoke(TOOL, "a")
+        assert guard.can_invoke(TOOL, "other-0")
+
+    def test_reset_tool_allows_again(self):
+        """测试：reset(tool) 后可以再次调用该工具"""
+        guard = ToolInvocationGuard()
+        guard.mark_invoked(TOOL, "a")
+        guard.mark_invoked("spawn_workers", "a")
+
+        guard.reset(TOOL)
+
+        assert guard.can_invoke(TOOL, "a")
+        assert not guard.can_invoke("spawn_workers", "a")
+
+    def test_reset_all_allows_again(self):
+        """测试：reset() 后所有工具都可以再次调用"""
+        guard = ToolInvocationGuard()
+        guard.mark_invoked(TOOL, "a")
+        guard.mark_invoked("spawn_workers", "a")
+
+        guard.reset()
+
+        assert guard.can_invoke(TOOL, "a")
+        assert guard.can_invoke("spawn_workers", "a")
+        guard.mark_invoked(TOOL, "a")
+        assert not guard.can_invoke(TOOL, "a")